@@ -1,24 +1,233 @@
 # COI Compliance Flask App
 
-from flask import Flask, jsonify, request
-from utils.gemini_service import GeminiService
+from flask import Flask, Response, jsonify, request, stream_with_context
+from flask.json.provider import DefaultJSONProvider
 from config import get_config, validate_config
 import os
 import logging
-from datetime import datetime
+import threading
+import time
+import orjson
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+from hashlib import blake2b
+from datetime import date, datetime, timezone
+from decimal import Decimal
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, Iterator, Optional, Union
+from pydantic import BaseModel, Field, ValidationError
 
-# Configure logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
-)
 logger = logging.getLogger(__name__)
 
+
+def _orjson_default(obj: Any) -> Any:
+    """Serialize types orjson does not handle natively"""
+    if isinstance(obj, (datetime, date)):
+        return obj.isoformat()
+    if isinstance(obj, Decimal):
+        return float(obj)
+    if isinstance(obj, Path):
+        return str(obj)
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+class OrjsonProvider(DefaultJSONProvider):
+    """Flask JSON provider backed by orjson"""
+
+    def dumps(self, obj: Any, **kwargs: Any) -> str:
+        return orjson.dumps(
+            obj, default=_orjson_default, option=orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY
+        ).decode()
+
+    def loads(self, s: Union[str, bytes], **kwargs: Any) -> Any:
+        return orjson.loads(s)
+
+
+class TTLCache:
+    """Thread-safe LRU cache whose entries expire after a fixed TTL"""
+
+    def __init__(self, maxsize: int = 256, ttl: float = 1800):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[Any]:
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return None
+            stored_at, value = entry
+            if time.monotonic() - stored_at > self.ttl:
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: Any) -> None:
+        with self._lock:
+            self._data[key] = (time.monotonic(), value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+
+# Bump whenever the Gemini prompt templates change so stale responses are not served
+CACHE_VERSION = "v3"
+response_cache = TTLCache(
+    maxsize=int(os.getenv("RESPONSE_CACHE_SIZE", 256)),
+    ttl=float(os.getenv("RESPONSE_CACHE_TTL", 1800))
+)
+
+
+def _stable_hash(obj: Any) -> str:
+    """Hash a JSON-serializable object independently of key order"""
+    payload = orjson.dumps(
+        obj, default=_orjson_default, option=orjson.OPT_SORT_KEYS | orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY
+    )
+    return blake2b(payload, digest_size=16).hexdigest()
+
+
+def _cache_key(kind: str, document_text: str, extra: Any) -> str:
+    """Build a versioned cache key from the document text and request context"""
+    text_hash = blake2b(document_text.encode(), digest_size=16).hexdigest()
+    return f"{CACHE_VERSION}-{kind}:{text_hash}:{_stable_hash(extra)}"
+
+
+# Request limits
+MAX_DOCUMENT_CHARS = 2_000_000
+MAX_CONTENT_LENGTH = 4 * 1024 * 1024
+
+
+class AnalyzeRequest(BaseModel):
+    """Request body for POST /analyze"""
+    document_text: str = Field(min_length=1, max_length=MAX_DOCUMENT_CHARS)
+    parsed_fields: Dict[str, Any] = {}
+
+
+class SummaryRequest(BaseModel):
+    """Request body for POST /summary"""
+    document_text: str = Field(min_length=1, max_length=MAX_DOCUMENT_CHARS)
+    compliance_results: Dict[str, Any] = {}
+
+
+def _invalid_request(error: ValidationError):
+    """Build a 400 response for a request body that failed validation"""
+    return jsonify({
+        "error": "Invalid request body",
+        "details": error.errors(include_url=False, include_input=False)
+    }), 400
+
+
 app = Flask(__name__)
+app.json = OrjsonProvider(app)
+# Werkzeug rejects larger bodies with 413 before buffering them
+app.config['MAX_CONTENT_LENGTH'] = MAX_CONTENT_LENGTH
 config = get_config()
 
-# Initialize Gemini Service
-gemini_service = GeminiService()
+# Gemini Service is created lazily on first use
+_gemini_singleton = None
+_gemini_lock = threading.Lock()
+
+
+def get_gemini():
+    """Return the shared GeminiService, creating it on first use"""
+    global _gemini_singleton
+    if _gemini_singleton is None:
+        with _gemini_lock:
+            if _gemini_singleton is None:
+                from utils.gemini_service import GeminiService
+                _gemini_singleton = GeminiService()
+    return _gemini_singleton
+
+
+# Shared pool for blocking Gemini calls. Worker threads are only started on
+# first submit, so nothing is spawned before gunicorn forks. GeminiService
+# reads the same GEMINI_TIMEOUT as the deadline for its own retries.
+GEMINI_TIMEOUT = float(os.getenv("GEMINI_TIMEOUT", 55))
+_gemini_executor = ThreadPoolExecutor(
+    max_workers=int(os.getenv("GEMINI_CONCURRENCY", 32)),
+    thread_name_prefix="gemini"
+)
+_gemini_slots = threading.BoundedSemaphore(int(os.getenv("GEMINI_MAX_PENDING", 64)))
+
+
+class GeminiOverloadedError(RuntimeError):
+    """Raised when too many Gemini calls are already queued or running"""
+
+
+def _run_gemini(func: Callable[..., Any], *args: Any) -> Any:
+    """Run a Gemini call on the shared pool and wait for its result"""
+    if not _gemini_slots.acquire(blocking=False):
+        raise GeminiOverloadedError("Too many Gemini requests in flight")
+    try:
+        future = _gemini_executor.submit(func, *args)
+    except Exception:
+        _gemini_slots.release()
+        raise
+    future.add_done_callback(lambda _: _gemini_slots.release())
+    return future.result(timeout=GEMINI_TIMEOUT)
+
+
+def _stream_gemini(chunks: Iterator[str]) -> Iterator[str]:
+    """Take a Gemini slot for a streamed response, pulling its chunks on the shared pool"""
+    if not _gemini_slots.acquire(blocking=False):
+        raise GeminiOverloadedError("Too many Gemini requests in flight")
+    return _pull_chunks(chunks)
+
+
+def _pull_chunks(chunks: Iterator[str]) -> Iterator[str]:
+    """Yield stream chunks, waiting at most GEMINI_TIMEOUT for each one"""
+    pending = None
+    try:
+        while True:
+            pending = _gemini_executor.submit(next, chunks, None)
+            chunk = pending.result(timeout=GEMINI_TIMEOUT)
+            if chunk is None:
+                break
+            yield chunk
+    finally:
+        # A timed-out pull still occupies a pool thread, so its slot is only
+        # freed once that call returns
+        if pending is None:
+            _gemini_slots.release()
+        else:
+            pending.add_done_callback(lambda _: _gemini_slots.release())
+
+
+def _sse(chunks: Iterable[str]) -> Iterator[str]:
+    """Format summary text chunks as server-sent events"""
+    try:
+        for chunk in chunks:
+            yield f"data: {orjson.dumps({'summary': chunk}).decode()}\n\n"
+        yield "event: done\ndata: {}\n\n"
+    except FutureTimeoutError:
+        logger.error("Summary stream timed out")
+        yield f"event: error\ndata: {orjson.dumps({'error': 'Gemini summary timed out'}).decode()}\n\n"
+    except Exception as e:
+        logger.error(f"Summary stream failed: {e}")
+        yield f"event: error\ndata: {orjson.dumps({'error': str(e)}).decode()}\n\n"
+
+
+def _wants_event_stream() -> bool:
+    """Whether the client prefers a server-sent event stream over JSON"""
+    best = request.accept_mimetypes.best_match(["application/json", "text/event-stream"])
+    return best == "text/event-stream"
+
+# Static part of the /health response
+_HEALTH_BASE = {
+    "status": "healthy",
+    "services": {
+        "gemini": "healthy",
+        "api": "healthy"
+    },
+    "version": config["pipeline"]["version"]
+}
+
+
+def _utc_timestamp() -> str:
+    """Current UTC time as an ISO 8601 string"""
+    return datetime.now(timezone.utc).isoformat(timespec='seconds')
 
 # Validate configuration on startup
 if not validate_config():
@@ -28,23 +237,16 @@ if not validate_config():
 def health_check():
     """Health check endpoint for monitoring"""
     try:
-        # Check Gemini service
-        gemini_status = "healthy" if gemini_service else "unhealthy"
+        # Only initialize the Gemini service on deep checks so liveness probes stay cheap
+        if request.args.get('deep') == '1':
+            get_gemini()
         
-        return jsonify({
-            "status": "healthy",
-            "timestamp": datetime.utcnow().isoformat(),
-            "services": {
-                "gemini": gemini_status,
-                "api": "healthy"
-            },
-            "version": config["pipeline"]["version"]
-        }), 200
+        return jsonify(_HEALTH_BASE | {"timestamp": _utc_timestamp()}), 200
     except Exception as e:
         logger.error(f"Health check failed: {e}")
         return jsonify({
             "status": "unhealthy",
-            "timestamp": datetime.utcnow().isoformat(),
+            "timestamp": _utc_timestamp(),
             "error": str(e)
         }), 500
 
@@ -68,13 +270,28 @@ def analyze_document():
     Endpoint to analyze a COI document
     """
     try:
-        content = request.json
-        document_text = content.get('document_text')
-        parsed_fields = content.get('parsed_fields', {})
+        payload = AnalyzeRequest.model_validate_json(request.get_data(cache=False))
+    except ValidationError as e:
+        return _invalid_request(e)
+    
+    try:
+        document_text = payload.document_text
+        parsed_fields = payload.parsed_fields
+        
+        cache_key = _cache_key("analyze", document_text, parsed_fields)
+        cached = response_cache.get(cache_key)
+        if cached is not None:
+            return jsonify(cached), 200
         
         # Perform analysis
-        analysis_result = gemini_service.analyze_coi_document(document_text, parsed_fields)
+        analysis_result = _run_gemini(get_gemini().analyze_coi_document, document_text, parsed_fields)
+        if analysis_result.get("status") == "success":
+            response_cache.set(cache_key, analysis_result)
         return jsonify(analysis_result), 200
+    except GeminiOverloadedError as e:
+        return jsonify({"error": str(e)}), 503
+    except FutureTimeoutError:
+        return jsonify({"error": "Gemini analysis timed out"}), 504
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
@@ -84,17 +301,36 @@ def generate_summary():
     Endpoint to generate a summary of a COI document
     """
     try:
-        content = request.json
-        document_text = content.get('document_text')
-        compliance_results = content.get('compliance_results', {})
+        payload = SummaryRequest.model_validate_json(request.get_data(cache=False))
+    except ValidationError as e:
+        return _invalid_request(e)
+    
+    try:
+        document_text = payload.document_text
+        compliance_results = payload.compliance_results
+        
+        # Stream the summary progressively when the client asks for SSE
+        if _wants_event_stream():
+            chunks = _stream_gemini(get_gemini().stream_summary(document_text, compliance_results))
+            return Response(
+                stream_with_context(_sse(chunks)),
+                mimetype="text/event-stream",
+                headers={"Cache-Control": "no-cache"}
+            )
+        
+        cache_key = _cache_key("summary", document_text, compliance_results)
+        cached = response_cache.get(cache_key)
+        if cached is not None:
+            return jsonify(cached), 200
         
         # Generate summary
-        summary_result = gemini_service.generate_summary(document_text, compliance_results)
+        summary_result = _run_gemini(get_gemini().generate_summary, document_text, compliance_results)
+        if summary_result.get("status") == "success":
+            response_cache.set(cache_key, summary_result)
         return jsonify(summary_result), 200
+    except GeminiOverloadedError as e:
+        return jsonify({"error": str(e)}), 503
+    except FutureTimeoutError:
+        return jsonify({"error": "Gemini summary timed out"}), 504
     except Exception as e:
         return jsonify({"error": str(e)}), 500
-
-if __name__ == "__main__":
-    debug_mode = os.getenv('FLASK_DEBUG', 'True').lower() in ['true', '1', 't']
-    app.run(debug=debug_mode, host='0.0.0.0', port=int(os.getenv('PORT', 8000)))
-
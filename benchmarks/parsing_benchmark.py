@@ -0,0 +1,64 @@
+"""
+Regex Parsing Benchmark
+
+Times the regex field parsing of the parsing step on the sample COI,
+repeated to a realistic multi-page length, as plain ASCII and with the
+non-ASCII punctuation OCR output routinely contains. Each case runs with
+the hyperscan keyword pre-scan (when installed) and without it.
+
+Run with: python -m benchmarks.parsing_benchmark
+"""
+
+import argparse
+import timeit
+from pathlib import Path
+from typing import Callable, Dict
+
+from steps import parsing_step
+
+SAMPLE_PATH = Path(__file__).resolve().parent.parent / "data" / "sample_coi.txt"
+
+
+def _parse(text: str) -> Dict:
+    """Parse without the per-text result cache"""
+    return parsing_step._parse_fields_cached.__wrapped__(text)
+
+
+def _time(func: Callable[[], object], number: int) -> float:
+    """Best-of-five time per call in milliseconds"""
+    return min(timeit.repeat(func, number=number, repeat=5)) / number * 1000
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark regex field parsing")
+    parser.add_argument("--repeat", type=int, default=20, help="Copies of the sample COI per document")
+    parser.add_argument("--number", type=int, default=50, help="Calls per timing")
+    args = parser.parse_args()
+    
+    sample = SAMPLE_PATH.read_text(encoding="utf-8", errors="replace")
+    ascii_text = "".join(char if char.isascii() else " " for char in sample) * args.repeat
+    texts = {
+        "ascii": ascii_text,
+        "non-ascii": ascii_text.replace("'", "’").replace(" - ", " — ") + " § •",
+    }
+    
+    anchor_db = parsing_step._ANCHOR_DB
+    print(f"{len(ascii_text)} characters per document")
+    for name, text in texts.items():
+        # Both paths must parse identically
+        expected = _parse(text)
+        try:
+            parsing_step._ANCHOR_DB = None
+            assert _parse(text) == expected
+            plain = _time(lambda: _parse(text), args.number)
+        finally:
+            parsing_step._ANCHOR_DB = anchor_db
+        
+        line = f"{name:>10}: re only {plain:.3f} ms"
+        if anchor_db is not None:
+            line += f", hyperscan pre-scan {_time(lambda: _parse(text), args.number):.3f} ms"
+        print(line)
+
+
+if __name__ == "__main__":
+    main()
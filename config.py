@@ -3,19 +3,40 @@ Configuration settings for COI Compliance Validation Pipeline
 """
 
 import os
+import sys
+import atexit
+import functools
+import logging
+import logging.config
+import multiprocessing
+import queue
+from logging.handlers import QueueHandler, QueueListener
 from pathlib import Path
-from typing import Dict, Any
+from typing import Dict, Any, Optional
+
+# Environment values treated as true by env_bool()
+_BOOL_TRUE = frozenset({"1", "t", "true", "yes", "on"})
+
+
+def env_bool(name: str, default: bool = False) -> bool:
+    """Read a boolean flag from the environment"""
+    value = os.getenv(name)
+    if value is None:
+        return default
+    return value.strip().lower() in _BOOL_TRUE
 
 # Project paths
 PROJECT_ROOT = Path(__file__).parent
 DATA_DIR = PROJECT_ROOT / "data"
 REPORTS_DIR = PROJECT_ROOT / "reports"
 UTILS_DIR = PROJECT_ROOT / "utils"
+CACHE_DIR = PROJECT_ROOT / ".cache"
 
-# Ensure directories exist
-DATA_DIR.mkdir(exist_ok=True)
-REPORTS_DIR.mkdir(exist_ok=True)
-UTILS_DIR.mkdir(exist_ok=True)
+@functools.cache
+def _ensure_dirs() -> None:
+    """Create the project directories once per process"""
+    for directory in (DATA_DIR, REPORTS_DIR, UTILS_DIR):
+        directory.mkdir(exist_ok=True)
 
 # Pipeline configuration
 PIPELINE_CONFIG = {
@@ -45,7 +66,7 @@ GEMINI_CONFIG = {
 FLASK_CONFIG = {
     "host": "0.0.0.0",
     "port": 5000,
-    "debug": os.getenv("FLASK_DEBUG", "False").lower() == "true",
+    "debug": env_bool("FLASK_DEBUG"),
     "env": os.getenv("FLASK_ENV", "production"),
 }
 
@@ -81,8 +102,91 @@ LOGGING_CONFIG = {
     "file": str(PROJECT_ROOT / "logs" / "pipeline.log"),
 }
 
+# Log records are handed to a background listener thread through this queue
+_log_queue: "queue.Queue[logging.LogRecord]" = queue.Queue(-1)
+_log_listener: Optional[QueueListener] = None
+
+# Pool worker processes cannot reach the in-memory queue above, so they send
+# their records to a second listener over a multiprocessing queue
+_worker_log_queue: Optional["multiprocessing.Queue[logging.LogRecord]"] = None
+_worker_log_listener: Optional[QueueListener] = None
+
+def _stop_log_listener() -> None:
+    """Flush and stop the background logging threads"""
+    global _log_listener, _worker_log_listener
+    if _log_listener is not None:
+        _log_listener.stop()
+        _log_listener = None
+    if _worker_log_listener is not None:
+        _worker_log_listener.stop()
+        _worker_log_listener = None
+
+def worker_log_queue() -> Optional["multiprocessing.Queue[logging.LogRecord]"]:
+    """Queue pool workers log to, or None when setup_logging has not run"""
+    return _worker_log_queue
+
+def init_worker_logging(log_queue: Optional["multiprocessing.Queue[logging.LogRecord]"], level: int) -> None:
+    """
+    Process pool initializer that sends a worker's log records to the parent
+    
+    Forked workers inherit a handler for the parent's in-memory queue, which
+    nothing drains in the child, so it is replaced.
+    """
+    if log_queue is None:
+        return
+    
+    root = logging.getLogger()
+    root.handlers[:] = [QueueHandler(log_queue)]
+    root.setLevel(level)
+
+def setup_logging(log_level: Optional[str] = None) -> None:
+    """
+    Configure root logging for the process
+    
+    Loggers only put records on an in-memory queue; a QueueListener thread
+    writes them to the log file and stdout. Process pool workers log through
+    their own multiprocessing queue and listener. Call once per process, e.g.
+    from an entry point or gunicorn's post_fork hook.
+    """
+    _stop_log_listener()
+    
+    log_file = Path(LOGGING_CONFIG["file"])
+    log_file.parent.mkdir(parents=True, exist_ok=True)
+    
+    formatter = logging.Formatter(LOGGING_CONFIG["format"])
+    file_handler = logging.FileHandler(log_file)
+    file_handler.setFormatter(formatter)
+    stream_handler = logging.StreamHandler(sys.stdout)
+    stream_handler.setFormatter(formatter)
+    
+    logging.config.dictConfig({
+        "version": 1,
+        "disable_existing_loggers": False,
+        "handlers": {
+            "queue": {
+                "class": "logging.handlers.QueueHandler",
+                "queue": _log_queue,
+            },
+        },
+        "root": {
+            "handlers": ["queue"],
+            "level": (log_level or LOGGING_CONFIG["level"]).upper(),
+        },
+    })
+    
+    global _log_listener, _worker_log_queue, _worker_log_listener
+    _log_listener = QueueListener(_log_queue, file_handler, stream_handler)
+    _log_listener.start()
+    
+    _worker_log_queue = multiprocessing.Queue()
+    _worker_log_listener = QueueListener(_worker_log_queue, file_handler, stream_handler)
+    _worker_log_listener.start()
+
+atexit.register(_stop_log_listener)
+
 def get_config() -> Dict[str, Any]:
     """Get all configuration settings"""
+    _ensure_dirs()
     return {
         "pipeline": PIPELINE_CONFIG,
         "gemini": GEMINI_CONFIG,
@@ -92,8 +196,14 @@ def get_config() -> Dict[str, Any]:
         "logging": LOGGING_CONFIG,
     }
 
+@functools.cache
 def validate_config() -> bool:
-    """Validate configuration settings"""
+    """
+    Validate configuration settings
+    
+    The result is memoized; call validate_config.cache_clear() after
+    changing the environment or the rules file to re-run the checks.
+    """
     if not GEMINI_CONFIG["api_key"]:
         print("WARNING: GEMINI_API_KEY not found in environment variables")
         return False
@@ -0,0 +1,33 @@
+"""
+Gunicorn configuration for the COI Compliance Flask API
+
+Run with: gunicorn -c gunicorn_conf.py app:app
+"""
+
+import os
+
+bind = f"0.0.0.0:{os.getenv('PORT', '8000')}"
+
+# Threaded workers overlap the blocking Gemini API calls
+workers = int(os.getenv("WEB_CONCURRENCY", 2))
+worker_class = "gthread"
+threads = int(os.getenv("THREADS", 8))
+
+# Load the app once in the master and fork it into the workers
+preload_app = True
+
+# Gemini requests can take a while on long documents
+timeout = 120
+
+
+def post_fork(server, worker):
+    """Set up per-worker logging and drop any Gemini client inherited from the master"""
+    import app
+    from config import setup_logging
+
+    # The logging listener thread does not survive fork, so start it per worker
+    setup_logging()
+
+    # The gRPC channel used by the Gemini SDK is not fork-safe, so each
+    # worker lazily builds its own on first request
+    app._gemini_singleton = None
@@ -9,30 +9,11 @@ import logging
 from pathlib import Path
 from typing import Optional
 
-from config import get_config, validate_config
+from config import get_config, setup_logging, validate_config
 from pipelines.coi_compliance_pipeline import coi_compliance_pipeline
 
-# Set up logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
-)
 logger = logging.getLogger(__name__)
 
-def setup_logging(log_level: str = "INFO"):
-    """Configure logging for the application"""
-    log_dir = Path("logs")
-    log_dir.mkdir(exist_ok=True)
-    
-    logging.basicConfig(
-        level=getattr(logging, log_level.upper()),
-        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-        handlers=[
-            logging.FileHandler(log_dir / "pipeline.log"),
-            logging.StreamHandler(sys.stdout)
-        ]
-    )
-
 def run_pipeline(
     data_path: Optional[str] = None,
     output_path: Optional[str] = None,
@@ -7,17 +7,12 @@ This pipeline orchestrates the entire COI compliance validation workflow:
 3. Parse insurance policy fields
 4. Validate compliance against business rules
 5. Generate compliance reports
-"""
-
-import sys
-import os
-from pathlib import Path
 
-# Add the parent directory to the Python path
-parent_dir = Path(__file__).parent.parent
-sys.path.insert(0, str(parent_dir))
+Run from the project root with: python -m pipelines.coi_compliance_pipeline
+"""
 
 from zenml import pipeline
+from config import env_bool
 from steps.ingest_step import ingest_coi_pdfs
 from steps.ocr_step import extract_text_from_pdf
 from steps.parsing_step import parse_insurance_fields
@@ -73,9 +68,6 @@ def coi_compliance_pipeline(
 
 
 if __name__ == "__main__":
-    # Change to the parent directory for proper execution
-    os.chdir(parent_dir)
-    
     print("🚀 Running COI Compliance Pipeline directly...")
     print("=" * 60)
     
@@ -88,5 +80,6 @@ if __name__ == "__main__":
         print(f"📈 Pipeline Status: {result.status}")
     except Exception as e:
         print(f"\n❌ Pipeline failed with error: {e}")
-        import traceback
-        traceback.print_exc()
+        if env_bool("COI_DEBUG"):
+            import traceback
+            traceback.print_exc()
@@ -5,15 +5,53 @@ This step validates parsed insurance fields against business rules
 and compliance requirements.
 """
 
-import json
-from typing import List, Dict, Any, Optional
-from datetime import datetime, timedelta
+import copy
+import re
+import functools
+from typing import List, Dict, Any, Optional, Tuple
+from datetime import date, datetime, timedelta
 from pathlib import Path
+import numpy as np
+import orjson
 from zenml import step
 from zenml.logger import get_logger
+try:
+    from numba import njit
+except ImportError:
+    def njit(*args, **kwargs):
+        """Fallback that leaves the function as plain Python when numba is missing"""
+        return lambda func: func
 
 logger = get_logger(__name__)
 
+_CURRENCY_RE = re.compile(r'[\d,]+')
+_NOTICE_DAYS_RE = re.compile(r'(\d+)\s*days?', re.IGNORECASE)
+
+# Accepted date layouts: m/d/Y, m-d-Y, m/d/y, m-d-y, "Month d, Y" and "d Month Y"
+_DATE_RE = re.compile(
+    r'(?P<m>\d{1,2})(?P<sep>[/-])(?P<d>\d{1,2})(?P=sep)(?P<y>\d{4}|\d{2})'
+    r'|(?P<mon>[A-Za-z]+)\s+(?P<d2>\d{1,2}),\s+(?P<y2>\d{4})'
+    r'|(?P<d3>\d{1,2})\s+(?P<mon2>[A-Za-z]+)\s+(?P<y3>\d{4})'
+)
+
+_MONTHS = {
+    name: number
+    for number, names in enumerate((
+        ("january", "jan"), ("february", "feb"), ("march", "mar"),
+        ("april", "apr"), ("may",), ("june", "jun"),
+        ("july", "jul"), ("august", "aug"), ("september", "sep"),
+        ("october", "oct"), ("november", "nov"), ("december", "dec"),
+    ), start=1)
+    for name in names
+}
+
+# Batches smaller than this skip the numpy date path
+VECTORIZE_MIN_BATCH = 32
+
+# Expiration status codes produced by _classify_expiration
+EXPIRATION_FAIL, EXPIRATION_WARNING, EXPIRATION_PASS = 0, 1, 2
+_EXPIRATION_STATUSES = ("fail", "warning", "pass")
+
 
 @step
 def validate_compliance(
@@ -36,7 +74,27 @@ def validate_compliance(
     # Load compliance rules
     rules = _load_compliance_rules(rules_path)
     
-    for result in parsed_results:
+    # One reference date for the whole run, so documents validated either
+    # side of midnight are judged consistently
+    today = date.today()
+    
+    # Check required fields and coverage limits for the whole batch in one pass
+    fields_list = [result.get('parsed_fields') or {} for result in parsed_results]
+    required_presence = _required_fields_presence(fields_list, rules.get("required_fields", []))
+    coverage_limits, coverage_violations = _batch_coverage_limits(
+        fields_list, rules.get("minimum_coverage_limits", {})
+    )
+    
+    # Date arithmetic only pays off in numpy for larger batches
+    expirations = None
+    if len(fields_list) >= VECTORIZE_MIN_BATCH:
+        expiration_dates, expiration_days = _batch_expiration_days(fields_list, today)
+        expiration_statuses = _classify_expiration(
+            expiration_days, float(rules.get("policy_expiration_warning_days", 30))
+        )
+        expirations = list(zip(expiration_dates, expiration_days.tolist(), expiration_statuses.tolist()))
+    
+    for i, result in enumerate(parsed_results):
         logger.info(f"Validating compliance for {result['file_name']}")
         
         if result['parsing_status'] == 'error':
@@ -51,7 +109,14 @@ def validate_compliance(
             continue
         
         # Run compliance checks
-        validation_results = _run_compliance_checks(result['parsed_fields'], rules)
+        validation_results = _run_compliance_checks(
+            result['parsed_fields'],
+            rules,
+            presence=required_presence[i],
+            coverage=(coverage_limits[i], int(coverage_violations[i])),
+            expiration=expirations[i] if expirations else None,
+            today=today
+        )
         
         # Determine overall compliance status
         overall_status = _determine_compliance_status(validation_results)
@@ -91,17 +156,17 @@ def _load_compliance_rules(rules_path: str) -> Dict[str, Any]:
     
     try:
         if Path(rules_path).exists():
-            with open(rules_path, 'r') as f:
-                rules = json.load(f)
-                logger.info(f"Loaded compliance rules from {rules_path}")
+            # The parsed rules are shared across calls, so hand out a copy
+            rules = copy.deepcopy(_read_rules_file(rules_path, Path(rules_path).stat().st_mtime_ns))
+            logger.info(f"Loaded compliance rules from {rules_path}")
         else:
             rules = default_rules
             logger.info("Using default compliance rules")
             
             # Create default rules file
             Path(rules_path).parent.mkdir(parents=True, exist_ok=True)
-            with open(rules_path, 'w') as f:
-                json.dump(default_rules, f, indent=2)
+            with open(rules_path, 'wb') as f:
+                f.write(orjson.dumps(default_rules, option=orjson.OPT_INDENT_2))
                 logger.info(f"Created default compliance rules file at {rules_path}")
                 
     except Exception as e:
@@ -111,19 +176,32 @@ def _load_compliance_rules(rules_path: str) -> Dict[str, Any]:
     return rules
 
 
-def _run_compliance_checks(fields: Dict[str, Any], rules: Dict[str, Any]) -> Dict[str, Any]:
+@functools.lru_cache(maxsize=8)
+def _read_rules_file(rules_path: str, mtime_ns: int) -> Dict[str, Any]:
+    """Parse a rules file once per modification time"""
+    return orjson.loads(Path(rules_path).read_bytes())
+
+
+def _run_compliance_checks(
+    fields: Dict[str, Any],
+    rules: Dict[str, Any],
+    presence: Optional[np.ndarray] = None,
+    coverage: Optional[Tuple[np.ndarray, int]] = None,
+    expiration: Optional[Tuple[Optional[date], int, int]] = None,
+    today: Optional[date] = None
+) -> Dict[str, Any]:
     """Run individual compliance checks"""
     
     validation_results = {}
     
     # Check required fields
-    validation_results["required_fields"] = _check_required_fields(fields, rules)
+    validation_results["required_fields"] = _check_required_fields(fields, rules, presence)
     
     # Check coverage limits
-    validation_results["coverage_limits"] = _check_coverage_limits(fields, rules)
+    validation_results["coverage_limits"] = _check_coverage_limits(fields, rules, coverage)
     
     # Check policy expiration
-    validation_results["policy_expiration"] = _check_policy_expiration(fields, rules)
+    validation_results["policy_expiration"] = _check_policy_expiration(fields, rules, expiration, today)
     
     # Check additional insureds
     validation_results["additional_insureds"] = _check_additional_insureds(fields, rules)
@@ -134,54 +212,92 @@ def _run_compliance_checks(fields: Dict[str, Any], rules: Dict[str, Any]) -> Dic
     return validation_results
 
 
-def _check_required_fields(fields: Dict[str, Any], rules: Dict[str, Any]) -> Dict[str, Any]:
-    """Check if all required fields are present"""
+def _check_required_fields(
+    fields: Dict[str, Any],
+    rules: Dict[str, Any],
+    presence: Optional[np.ndarray] = None
+) -> Dict[str, Any]:
+    """
+    Check if all required fields are present
+    
+    Args:
+        fields: Parsed insurance fields
+        rules: Compliance rules
+        presence: Precomputed row of _required_fields_presence; computed
+            here when not given
+    """
     
     required_fields = rules.get("required_fields", [])
+    if presence is None:
+        presence = _required_fields_presence([fields], required_fields)[0]
+    
     missing_fields = []
     present_fields = []
-    
-    for field in required_fields:
-        if field in fields and fields[field] is not None and fields[field] != "":
-            present_fields.append(field)
-        else:
-            missing_fields.append(field)
+    for field, present in zip(required_fields, presence.tolist()):
+        (present_fields if present else missing_fields).append(field)
     
     return {
-        "status": "pass" if not missing_fields else "fail",
+        "status": "pass" if presence.all() else "fail",
         "missing_fields": missing_fields,
         "present_fields": present_fields,
         "message": f"Missing required fields: {', '.join(missing_fields)}" if missing_fields else "All required fields present"
     }
 
 
-def _check_coverage_limits(fields: Dict[str, Any], rules: Dict[str, Any]) -> Dict[str, Any]:
-    """Check if coverage limits meet minimum requirements"""
+def _required_fields_presence(fields_list: List[Dict[str, Any]], required_fields: List[str]) -> np.ndarray:
+    """Build an (N, M) boolean matrix of which required fields each document has"""
+    presence = np.zeros((len(fields_list), len(required_fields)), dtype=bool)
+    
+    for i, fields in enumerate(fields_list):
+        # One lookup per required field; empty strings count as missing
+        get = fields.get
+        presence[i] = [get(field) not in (None, "") for field in required_fields]
+    
+    return presence
+
+
+def _check_coverage_limits(
+    fields: Dict[str, Any],
+    rules: Dict[str, Any],
+    coverage: Optional[Tuple[np.ndarray, int]] = None
+) -> Dict[str, Any]:
+    """
+    Check if coverage limits meet minimum requirements
+    
+    Args:
+        fields: Parsed insurance fields
+        rules: Compliance rules
+        coverage: Precomputed (limits row, violation bitmask) from
+            _batch_coverage_limits; computed here when not given
+    """
     
     minimum_limits = rules.get("minimum_coverage_limits", {})
     coverage_limits = fields.get("coverage_limits", {})
     
+    if coverage is None:
+        limits, violations = _batch_coverage_limits([fields], minimum_limits)
+        coverage = (limits[0], int(violations[0]))
+    limits_row, violation_mask = coverage
+    
     issues = []
     passed_checks = []
     
-    for coverage_type, min_amount in minimum_limits.items():
-        if coverage_type in coverage_limits:
-            # Extract numeric value from coverage limit string
-            limit_value = _extract_numeric_value(coverage_limits[coverage_type])
-            
-            if limit_value and limit_value >= min_amount:
-                passed_checks.append({
-                    "coverage_type": coverage_type,
-                    "current_limit": limit_value,
-                    "minimum_required": min_amount
-                })
-            else:
-                issues.append({
-                    "coverage_type": coverage_type,
-                    "current_limit": limit_value or 0,
-                    "minimum_required": min_amount,
-                    "message": f"Coverage limit ${limit_value or 0:,} is below minimum ${min_amount:,}"
-                })
+    for index, (coverage_type, min_amount) in enumerate(minimum_limits.items()):
+        limit_value = None if np.isnan(limits_row[index]) else int(limits_row[index])
+        
+        if not violation_mask >> index & 1:
+            passed_checks.append({
+                "coverage_type": coverage_type,
+                "current_limit": limit_value,
+                "minimum_required": min_amount
+            })
+        elif coverage_type in coverage_limits:
+            issues.append({
+                "coverage_type": coverage_type,
+                "current_limit": limit_value or 0,
+                "minimum_required": min_amount,
+                "message": f"Coverage limit ${limit_value or 0:,} is below minimum ${min_amount:,}"
+            })
         else:
             issues.append({
                 "coverage_type": coverage_type,
@@ -198,13 +314,69 @@ def _check_coverage_limits(fields: Dict[str, Any], rules: Dict[str, Any]) -> Dic
     }
 
 
-def _check_policy_expiration(fields: Dict[str, Any], rules: Dict[str, Any]) -> Dict[str, Any]:
-    """Check policy expiration date"""
+def _batch_coverage_limits(
+    fields_list: List[Dict[str, Any]],
+    minimum_limits: Dict[str, Any]
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Compare coverage limits of many policies against the minimums at once
+    
+    Returns:
+        Tuple of an (N, K) float array of parsed limits (NaN where missing or
+        unparseable) and a length-N array of violation bitmasks, where bit k
+        is set when the k-th coverage type in minimum_limits is not met
+    """
+    coverage_types = list(minimum_limits)
+    thresholds = np.array([minimum_limits[t] for t in coverage_types], dtype=np.float64)
+    
+    limits = np.full((len(fields_list), len(coverage_types)), np.nan)
+    for i, fields in enumerate(fields_list):
+        coverage_limits = fields.get("coverage_limits") or {}
+        for j, coverage_type in enumerate(coverage_types):
+            value = _extract_numeric_value(coverage_limits.get(coverage_type))
+            if value:
+                limits[i, j] = value
+    
+    return limits, _check_limits(limits, thresholds)
+
+
+@njit(cache=True)
+def _check_limits(limits: np.ndarray, thresholds: np.ndarray) -> np.ndarray:
+    """Return a per-policy bitmask of coverage types below their minimum"""
+    violations = np.zeros(limits.shape[0], dtype=np.int64)
+    for i in range(limits.shape[0]):
+        for j in range(limits.shape[1]):
+            # NaN (missing limit) never satisfies the minimum
+            if not limits[i, j] >= thresholds[j]:
+                violations[i] |= np.int64(1) << j
+    return violations
+
+
+def _check_policy_expiration(
+    fields: Dict[str, Any],
+    rules: Dict[str, Any],
+    expiration: Optional[Tuple[Optional[date], int, int]] = None,
+    today: Optional[date] = None
+) -> Dict[str, Any]:
+    """
+    Check policy expiration date
+    
+    Args:
+        fields: Parsed insurance fields
+        rules: Compliance rules
+        expiration: Precomputed (expiration date, days until expiration,
+            status code) from _batch_expiration_days and _classify_expiration;
+            parsed here when not given or when the batch could not parse the date
+        today: Reference date for days until expiration (default: today)
+    """
     
     warning_days = rules.get("policy_expiration_warning_days", 30)
     policy_period = fields.get("policy_period", {})
     expiration_date_str = policy_period.get("expiration_date")
     
+    if expiration is not None and expiration[0] is not None:
+        return _expiration_result(*expiration)
+    
     if not expiration_date_str:
         return {
             "status": "fail",
@@ -218,25 +390,10 @@ def _check_policy_expiration(fields: Dict[str, Any], rules: Dict[str, Any]) -> D
         expiration_date = _parse_date(expiration_date_str)
         
         if expiration_date:
-            today = datetime.now().date()
+            today = today or date.today()
             days_until_expiration = (expiration_date - today).days
-            
-            if days_until_expiration < 0:
-                status = "fail"
-                message = f"Policy expired {abs(days_until_expiration)} days ago"
-            elif days_until_expiration <= warning_days:
-                status = "warning"
-                message = f"Policy expires in {days_until_expiration} days"
-            else:
-                status = "pass"
-                message = f"Policy expires in {days_until_expiration} days"
-            
-            return {
-                "status": status,
-                "message": message,
-                "expiration_date": expiration_date.isoformat(),
-                "days_until_expiration": days_until_expiration
-            }
+            status_code = _classify_expiration(np.array([days_until_expiration]), float(warning_days))[0]
+            return _expiration_result(expiration_date, days_until_expiration, int(status_code))
         else:
             return {
                 "status": "fail",
@@ -254,6 +411,58 @@ def _check_policy_expiration(fields: Dict[str, Any], rules: Dict[str, Any]) -> D
         }
 
 
+
+def _expiration_result(expiration_date: date, days_until_expiration: int, status_code: int) -> Dict[str, Any]:
+    """Build the expiration check result for a parsed expiration date"""
+    if status_code == EXPIRATION_FAIL:
+        message = f"Policy expired {abs(days_until_expiration)} days ago"
+    else:
+        message = f"Policy expires in {days_until_expiration} days"
+    
+    return {
+        "status": _EXPIRATION_STATUSES[status_code],
+        "message": message,
+        "expiration_date": expiration_date.isoformat(),
+        "days_until_expiration": days_until_expiration
+    }
+
+
+def _batch_expiration_days(
+    fields_list: List[Dict[str, Any]],
+    today: date
+) -> Tuple[List[Optional[date]], np.ndarray]:
+    """
+    Compute days until expiration for many policies at once
+    
+    Returns:
+        Tuple of the parsed expiration dates (None where missing or
+        unparseable) and a length-N int64 array of days until each date;
+        entries for unparsed dates are meaningless
+    """
+    expiration_dates = []
+    for fields in fields_list:
+        expiration_date_str = (fields.get("policy_period") or {}).get("expiration_date")
+        expiration_dates.append(_parse_date(expiration_date_str) if isinstance(expiration_date_str, str) else None)
+    
+    dates = np.array([d or today for d in expiration_dates], dtype="datetime64[D]")
+    days = (dates - np.datetime64(today, "D")).astype(np.int64)
+    return expiration_dates, days
+
+
+
+@njit(cache=True)
+def _classify_expiration(days: np.ndarray, warning_days: float) -> np.ndarray:
+    """Return a per-policy expiration status code (fail, warning or pass)"""
+    statuses = np.empty(days.shape[0], dtype=np.int8)
+    for i in range(days.shape[0]):
+        if days[i] < 0:
+            statuses[i] = EXPIRATION_FAIL
+        elif days[i] <= warning_days:
+            statuses[i] = EXPIRATION_WARNING
+        else:
+            statuses[i] = EXPIRATION_PASS
+    return statuses
+
 def _check_additional_insureds(fields: Dict[str, Any], rules: Dict[str, Any]) -> Dict[str, Any]:
     """Check for required additional insureds"""
     
@@ -268,14 +477,12 @@ def _check_additional_insureds(fields: Dict[str, Any], rules: Dict[str, Any]) ->
             "found": additional_insureds
         }
     
+    # Lowercase each name once rather than on every comparison
+    lowered_actual = [actual.lower() for actual in additional_insureds]
     missing_insureds = []
     for required in required_insureds:
-        found = False
-        for actual in additional_insureds:
-            if required.lower() in actual.lower():
-                found = True
-                break
-        if not found:
+        required_lower = required.lower()
+        if not any(required_lower in actual for actual in lowered_actual):
             missing_insureds.append(required)
     
     return {
@@ -302,8 +509,7 @@ def _check_cancellation_clause(fields: Dict[str, Any], rules: Dict[str, Any]) ->
         }
     
     # Extract notice days from clause
-    import re
-    match = re.search(r"(\d+)\s*days?", cancellation_clause, re.IGNORECASE)
+    match = _NOTICE_DAYS_RE.search(cancellation_clause)
     
     if match:
         found_notice_days = int(match.group(1))
@@ -334,23 +540,18 @@ def _check_cancellation_clause(fields: Dict[str, Any], rules: Dict[str, Any]) ->
 def _determine_compliance_status(validation_results: Dict[str, Any]) -> str:
     """Determine overall compliance status"""
     
-    has_failures = False
     has_warnings = False
     
-    for check_name, check_result in validation_results.items():
-        status = check_result.get("status", "unknown")
+    for check_result in validation_results.values():
+        status = check_result.get("status")
         
+        # A single failure decides the verdict
         if status == "fail":
-            has_failures = True
-        elif status == "warning":
+            return "non_compliant"
+        if status == "warning":
             has_warnings = True
     
-    if has_failures:
-        return "non_compliant"
-    elif has_warnings:
-        return "compliant_with_warnings"
-    else:
-        return "compliant"
+    return "compliant_with_warnings" if has_warnings else "compliant"
 
 
 def _extract_numeric_value(value_str: str) -> Optional[int]:
@@ -358,12 +559,11 @@ def _extract_numeric_value(value_str: str) -> Optional[int]:
     if not value_str:
         return None
     
-    import re
     # Remove currency symbols and commas, extract first number
-    numbers = re.findall(r'[\d,]+', str(value_str))
-    if numbers:
+    match = _CURRENCY_RE.search(str(value_str))
+    if match:
         try:
-            return int(numbers[0].replace(',', ''))
+            return int(match.group(0).replace(',', ''))
         except ValueError:
             return None
     return None
@@ -374,22 +574,27 @@ def _parse_date(date_str: str) -> Optional[datetime.date]:
     if not date_str:
         return None
     
-    # Common date formats
-    formats = [
-        "%m/%d/%Y",
-        "%m-%d-%Y",
-        "%m/%d/%y",
-        "%m-%d-%y",
-        "%B %d, %Y",
-        "%b %d, %Y",
-        "%d %B %Y",
-        "%d %b %Y"
-    ]
-    
-    for fmt in formats:
-        try:
-            return datetime.strptime(date_str.strip(), fmt).date()
-        except ValueError:
-            continue
+    match = _DATE_RE.fullmatch(date_str.strip())
+    if not match:
+        return None
     
-    return None
+    group = match.group
+    if group('m') is not None:
+        month = int(group('m'))
+        day = int(group('d'))
+        year = int(group('y'))
+        if len(group('y')) == 2:
+            # Same pivot as strptime's %y
+            year += 1900 if year >= 69 else 2000
+    else:
+        is_month_first = group('mon') is not None
+        month = _MONTHS.get((group('mon') if is_month_first else group('mon2')).lower())
+        if month is None:
+            return None
+        day = int(group('d2') if is_month_first else group('d3'))
+        year = int(group('y2') if is_month_first else group('y3'))
+    
+    try:
+        return date(year, month, day)
+    except ValueError:
+        return None
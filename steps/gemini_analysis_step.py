@@ -5,19 +5,25 @@ This step integrates Google Gemini 2.0 to provide AI-powered analysis
 and summarization of COI documents within the ZenML pipeline.
 """
 
-from typing import List, Dict, Any
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Awaitable, Callable, Coroutine, Dict, List, TypeVar
+import orjson
 from zenml import step
 from zenml.logger import get_logger
 from utils.gemini_service import GeminiService
 
 logger = get_logger(__name__)
 
+T = TypeVar("T")
+
 
 @step
 def analyze_with_gemini(
     compliance_results: List[Dict[str, Any]],
     enable_analysis: bool = True,
-    enable_summary: bool = True
+    enable_summary: bool = True,
+    max_workers: int = 8
 ) -> List[Dict[str, Any]]:
     """
     Analyze COI documents using Google Gemini 2.0 AI
@@ -26,6 +32,7 @@ def analyze_with_gemini(
         compliance_results: List of compliance validation results
         enable_analysis: Whether to perform detailed analysis
         enable_summary: Whether to generate summary
+        max_workers: Maximum number of documents analyzed concurrently
         
     Returns:
         List of results with AI-powered insights
@@ -35,58 +42,25 @@ def analyze_with_gemini(
     
     try:
         # Initialize Gemini service
-        gemini_service = GeminiService()
+        gemini_service = _DedupedGeminiService(GeminiService())
         logger.info("Gemini service initialized successfully")
         
-        for result in compliance_results:
-            logger.info(f"Analyzing document: {result['file_name']}")
-            
-            # Skip if there was an error in previous steps
-            if result['compliance_status'] == 'error':
-                enhanced_results.append({
-                    **result,
-                    "gemini_analysis": {
-                        "status": "skipped",
-                        "message": "Skipped due to previous errors"
-                    }
-                })
-                continue
-            
-            # Extract document text and parsed fields
-            original_metadata = result.get('original_metadata', {})
-            document_text = original_metadata.get('original_metadata', {}).get('extracted_text', '')
-            parsed_fields = original_metadata.get('parsed_fields', {})
-            
-            gemini_analysis = {}
-            
-            # Perform detailed analysis if enabled
-            if enable_analysis:
-                logger.info(f"Performing detailed analysis for {result['file_name']}")
-                analysis_result = gemini_service.analyze_coi_document(document_text, parsed_fields)
-                gemini_analysis['detailed_analysis'] = analysis_result
-            
-            # Generate summary if enabled
-            if enable_summary:
-                logger.info(f"Generating summary for {result['file_name']}")
-                summary_result = gemini_service.generate_summary(document_text, result)
-                gemini_analysis['summary'] = summary_result
-            
-            # Extract key insights
-            logger.info(f"Extracting key insights for {result['file_name']}")
-            insights = gemini_service.extract_key_insights(document_text)
-            gemini_analysis['key_insights'] = insights
-            
-            # Add Gemini analysis to results
-            enhanced_results.append({
-                **result,
-                "gemini_analysis": gemini_analysis
-            })
-            
+        # Gemini calls are network-bound, so all requests for the batch are
+        # in flight together on one event loop
+        enhanced_results = _run_coroutine(_analyze_documents(
+            compliance_results,
+            gemini_service,
+            enable_analysis,
+            enable_summary,
+            max_workers
+        ))
+        
         logger.info(f"Successfully analyzed {len(enhanced_results)} documents with Gemini")
         
     except Exception as e:
         logger.error(f"Error in Gemini analysis: {e}")
         # Return original results with error info if Gemini fails
+        enhanced_results = []
         for result in compliance_results:
             enhanced_results.append({
                 **result,
@@ -97,3 +71,134 @@ def analyze_with_gemini(
             })
     
     return enhanced_results
+
+
+def _run_coroutine(coro: Coroutine[Any, Any, T]) -> T:
+    """
+    Run a coroutine to completion from synchronous code
+    
+    asyncio.run refuses to start while an event loop is already running in
+    this thread (e.g. a notebook or an async orchestrator calling the step
+    directly), so in that case the coroutine gets its own loop on a private
+    thread.
+    """
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return asyncio.run(coro)
+    
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        return executor.submit(asyncio.run, coro).result()
+
+
+async def _analyze_documents(
+    compliance_results: List[Dict[str, Any]],
+    gemini_service: "_DedupedGeminiService",
+    enable_analysis: bool,
+    enable_summary: bool,
+    max_workers: int
+) -> List[Dict[str, Any]]:
+    """Analyze all documents concurrently, preserving input order"""
+    semaphore = asyncio.Semaphore(max_workers)
+    
+    async def analyze(result: Dict[str, Any]) -> Dict[str, Any]:
+        async with semaphore:
+            return await _analyze_document(result, gemini_service, enable_analysis, enable_summary)
+    
+    return await asyncio.gather(*(analyze(result) for result in compliance_results))
+
+
+async def _analyze_document(
+    result: Dict[str, Any],
+    gemini_service: "_DedupedGeminiService",
+    enable_analysis: bool,
+    enable_summary: bool
+) -> Dict[str, Any]:
+    """Run the enabled Gemini analyses for a single compliance result"""
+    logger.info(f"Analyzing document: {result['file_name']}")
+    
+    # Skip if there was an error in previous steps
+    if result['compliance_status'] == 'error':
+        return {
+            **result,
+            "gemini_analysis": {
+                "status": "skipped",
+                "message": "Skipped due to previous errors"
+            }
+        }
+    
+    # Extract document text and parsed fields
+    original_metadata = result.get('original_metadata', {})
+    document_text = original_metadata.get('original_metadata', {}).get('extracted_text', '')
+    parsed_fields = original_metadata.get('parsed_fields', {})
+    
+    gemini_analysis = await gemini_service.process_document(
+        document_text,
+        parsed_fields,
+        result,
+        enable_analysis=enable_analysis,
+        enable_summary=enable_summary
+    )
+    
+    # Add Gemini analysis to results
+    return {
+        **result,
+        "gemini_analysis": gemini_analysis
+    }
+
+
+class _DedupedGeminiService:
+    """
+    GeminiService wrapper that sends duplicate documents to Gemini once
+    
+    Analyses and key insights depend only on the document text and parsed
+    fields, so re-submitted certificates reuse the first result for the
+    rest of the step run. Summaries also depend on per-file compliance
+    results and are always generated.
+    """
+    
+    def __init__(self, service: GeminiService):
+        self._service = service
+        self._results: Dict[tuple, "asyncio.Future[Any]"] = {}
+    
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._service, name)
+    
+    # Reuse GeminiService's fan-out so its calls go through the methods below
+    process_document = GeminiService.process_document
+    
+    async def analyze_coi_document_async(self, document_text: str, parsed_fields: Dict[str, Any]) -> Dict[str, Any]:
+        return await self._once(
+            "analysis",
+            self._service.analyze_coi_document_async,
+            lambda result: result.get("status") == "success",
+            document_text,
+            parsed_fields
+        )
+    
+    async def extract_key_insights_async(self, document_text: str) -> List[str]:
+        return await self._once(
+            "insights",
+            self._service.extract_key_insights_async,
+            lambda insights: not (insights and str(insights[0]).startswith("Error extracting insights")),
+            document_text
+        )
+    
+    async def _once(
+        self,
+        kind: str,
+        func: Callable[..., Awaitable[Any]],
+        succeeded: Callable[[Any], bool],
+        *args: Any
+    ) -> Any:
+        key = (kind, orjson.dumps(args, default=str, option=orjson.OPT_SORT_KEYS))
+        # Duplicates that arrive while the first call is in flight wait for it
+        future = self._results.get(key)
+        if future is None:
+            future = self._results[key] = asyncio.ensure_future(func(*args))
+        
+        result = await future
+        # Failed calls are not remembered so a later duplicate retries them
+        if not succeeded(result) and self._results.get(key) is future:
+            del self._results[key]
+        return result
@@ -8,16 +8,10 @@ This step handles ingesting COI PDF files from various sources:
 """
 
 import os
-from typing import List, Dict, Any, Optional
+from typing import Iterator, List, Dict, Any, Optional
 from pathlib import Path
 from zenml import step
 from zenml.logger import get_logger
-try:
-    import boto3
-    from botocore.exceptions import ClientError
-except ImportError:
-    boto3 = None
-    ClientError = None
 
 logger = get_logger(__name__)
 
@@ -61,57 +55,81 @@ def ingest_coi_pdfs(
 def _ingest_local_files(data_path: str, file_extensions: List[str]) -> List[Dict[str, Any]]:
     """Ingest PDF files from local file system"""
     pdf_files = []
-    data_dir = Path(data_path)
+    extensions = frozenset(file_extensions)
     
-    for file_path in data_dir.rglob("*"):
-        if file_path.is_file() and file_path.suffix.lower() in file_extensions:
-            pdf_files.append({
-                "file_path": str(file_path),
-                "file_name": file_path.name,
-                "file_size": file_path.stat().st_size,
-                "source": "local",
-                "last_modified": file_path.stat().st_mtime
-            })
+    if os.path.isdir(data_path):
+        # One stat per file; scandir entries cache it
+        files = (
+            (entry.path, entry.name, entry.stat()) for entry in _walk_files(data_path)
+            if os.path.splitext(entry.name)[1].lower() in extensions
+        )
+    elif os.path.splitext(data_path)[1].lower() in extensions:
+        # A single file was given instead of a directory
+        files = [(data_path, os.path.basename(data_path), os.stat(data_path))]
+    else:
+        files = []
+    
+    for path, name, stat in files:
+        pdf_files.append({
+            "file_path": path,
+            "file_name": name,
+            "file_size": stat.st_size,
+            "source": "local",
+            "last_modified": stat.st_mtime
+        })
     
     return pdf_files
 
 
+def _walk_files(root: str) -> Iterator[os.DirEntry]:
+    """Recursively yield the files under a directory"""
+    with os.scandir(root) as entries:
+        for entry in entries:
+            if entry.is_dir(follow_symlinks=False):
+                yield from _walk_files(entry.path)
+            elif entry.is_file():
+                yield entry
+
+
 def _ingest_s3_files(s3_bucket: str, s3_prefix: str, file_extensions: List[str]) -> List[Dict[str, Any]]:
-    """Ingest PDF files from S3 bucket"""
-    pdf_files = []
+    """
+    List PDF files in an S3 bucket
     
-    if boto3 is None:
+    Objects are not downloaded here; their s3:// URIs are returned and the
+    OCR step reads each object straight into memory when it processes it.
+    """
+    # boto3 is only imported when an S3 bucket is actually configured
+    try:
+        import boto3
+    except ImportError:
         logger.error("boto3 is not available. Install it with: pip install boto3")
         raise ImportError("boto3 is required for S3 functionality")
     
+    pdf_files = []
+    
     try:
         s3_client = boto3.client('s3')
         
-        # List objects in S3 bucket with prefix
-        response = s3_client.list_objects_v2(
-            Bucket=s3_bucket,
-            Prefix=s3_prefix
-        )
-        
-        if 'Contents' in response:
-            for obj in response['Contents']:
+        # List every object under the prefix; a single list_objects_v2 call
+        # stops at 1000 keys
+        paginator = s3_client.get_paginator('list_objects_v2')
+        for page in paginator.paginate(Bucket=s3_bucket, Prefix=s3_prefix):
+            for obj in page.get('Contents', []):
                 key = obj['Key']
-                file_extension = Path(key).suffix.lower()
+                if Path(key).suffix.lower() not in file_extensions:
+                    continue
                 
-                if file_extension in file_extensions:
-                    # Download file to local temp directory
-                    local_path = f"/tmp/{Path(key).name}"
-                    s3_client.download_file(s3_bucket, key, local_path)
-                    
-                    pdf_files.append({
-                        "file_path": local_path,
-                        "file_name": Path(key).name,
-                        "file_size": obj['Size'],
-                        "source": "s3",
-                        "s3_bucket": s3_bucket,
-                        "s3_key": key,
-                        "last_modified": obj['LastModified'].timestamp()
-                    })
+                pdf_files.append({
+                    "file_path": f"s3://{s3_bucket}/{key}",
+                    "file_name": Path(key).name,
+                    "file_size": obj['Size'],
+                    "source": "s3",
+                    "s3_bucket": s3_bucket,
+                    "s3_key": key,
+                    "last_modified": obj['LastModified'].timestamp(),
+                    # The ETag identifies the object's content without downloading it
+                    "content_hash": f"etag:{obj['ETag'].strip(chr(34))}"
+                })
         
     except Exception as e:
         logger.error(f"Error accessing S3 bucket {s3_bucket}: {e}")
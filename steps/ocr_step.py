@@ -5,27 +5,71 @@ This step handles text extraction from COI PDF files using EasyOCR
 and PyPDF2 for both scanned and text-based PDFs.
 """
 
+import io
 import os
-from typing import List, Dict, Any
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache, partial
+from hashlib import blake2b
+from importlib import metadata, util
+from typing import Any, BinaryIO, Dict, List, Optional, Tuple
 from pathlib import Path
-import easyocr
-import PyPDF2
-from PIL import Image
-try:
-    import pdf2image
-except ImportError:
-    pdf2image = None
+import numpy as np
+import orjson
 from zenml import step
 from zenml.logger import get_logger
+from config import CACHE_DIR, env_bool
+from utils.concurrency import map_documents, process_pool
 
 logger = get_logger(__name__)
 
+# Page render scale for OCR (PDF user space is 72 dpi, so this renders at 200 dpi)
+OCR_RENDER_SCALE = 200 / 72
+
+# Number of text regions EasyOCR recognizes per forward pass
+OCR_BATCH_SIZE = 8
+
+# Pages rendered and passed through the detector together; the detector
+# stacks every page it is given into one tensor, so this bounds peak memory
+# on long scanned documents
+OCR_PAGES_PER_BATCH = 4
+
+# Extracted text keyed by PDF content, so unchanged files are not re-processed
+OCR_CACHE_DIR = CACHE_DIR / "ocr"
+
+# Approximate resident size of one worker's EasyOCR models and buffers; the
+# default worker count keeps that many copies within physical memory
+OCR_WORKER_MEMORY = 2 * 1024 ** 3
+
+# Torch intra-op threads for this process's readers; set in OCR pool
+# workers so the workers share the cores instead of each using all of them
+_torch_threads: Optional[int] = None
+
+# Worker processes hold their EasyOCR readers, so the pool outlives a single
+# step run and later runs in the same process reuse the loaded models
+_pool: Optional[ProcessPoolExecutor] = None
+_pool_workers: Optional[int] = None
+_pool_lock = threading.Lock()
+
+# Prefix of content digests computed while deduplicating local files
+_DIGEST_PREFIX = "blake2b:"
+
+# Per-file pointers to OCR cache entries keyed by ingest metadata, so reruns
+# skip files that were already extracted without even re-reading them
+CHECKPOINT_DIR = CACHE_DIR / "extracted"
+
+# Cache entries and checkpoints unused for this long are deleted; checkpoints
+# of modified or removed files are never read again, so this clears them too
+CACHE_MAX_AGE = float(os.getenv("CACHE_MAX_AGE_DAYS", 30)) * 24 * 3600
+
 
 @step
 def extract_text_from_pdf(
     pdf_files: List[Dict[str, Any]],
     use_ocr: bool = True,
-    languages: List[str] = ['en']
+    languages: List[str] = ['en'],
+    max_workers: Optional[int] = None
 ) -> List[Dict[str, Any]]:
     """
     Extract text from COI PDF files using OCR and text extraction
@@ -34,110 +78,458 @@ def extract_text_from_pdf(
         pdf_files: List of PDF file metadata dictionaries
         use_ocr: Whether to use OCR for scanned PDFs
         languages: List of languages for OCR recognition
+        max_workers: Maximum number of PDFs processed concurrently (default:
+            OCR_MAX_WORKERS, or the CPU count capped by available memory)
         
     Returns:
         List of dictionaries containing extracted text and metadata
     """
     
-    extracted_texts = []
+    languages = tuple(sorted(languages))
+    _prune_cache()
+    
+    # Identical files are only extracted once
+    unique_files: Dict[str, Dict[str, Any]] = {}
+    file_keys = []
+    for pdf_file in pdf_files:
+        key = _dedupe_key(pdf_file, use_ocr, languages)
+        file_keys.append(key)
+        if key not in unique_files:
+            # Hand the digest on so the worker does not hash the file again
+            unique_files[key] = {**pdf_file, "content_hash": key} if key.startswith(_DIGEST_PREFIX) else pdf_file
+    
+    process = partial(_process_pdf, use_ocr=use_ocr, languages=languages)
     
-    # Initialize EasyOCR reader if OCR is enabled
-    if use_ocr:
-        logger.info(f"Initializing EasyOCR reader for languages: {languages}")
-        reader = easyocr.Reader(languages)
+    if use_ocr and len(unique_files) > 1 and _cuda_available():
+        # Every worker would load its own models and CUDA context onto the
+        # one GPU, so extract here with this process's cached reader
+        unique_results = [process(pdf_file) for pdf_file in unique_files.values()]
     else:
-        reader = None
+        # PDFs are independent and OCR is CPU-bound, so extract them in
+        # separate processes; each worker builds its own EasyOCR reader
+        workers = max_workers or _default_ocr_workers()
+        try:
+            unique_results = map_documents(
+                process,
+                unique_files.values(),
+                max_workers=workers,
+                executor=_ocr_pool(workers)
+            )
+        except Exception:
+            # A broken pool fails every later submit; start a fresh one next run
+            _shutdown_ocr_pool()
+            raise
+    results_by_key = dict(zip(unique_files, unique_results))
     
-    for pdf_file in pdf_files:
-        logger.info(f"Processing PDF: {pdf_file['file_name']}")
+    extracted_texts = []
+    extracted_keys = set()
+    for pdf_file, key in zip(pdf_files, file_keys):
+        result = results_by_key[key]
         
-        try:
-            # Check if it's a text file
-            if pdf_file['file_path'].endswith('.txt'):
-                with open(pdf_file['file_path'], 'r', encoding='utf-8') as f:
-                    extracted_text = f.read()
-                extraction_method = "text"
-            else:
-                # First, try to extract text directly from PDF
-                direct_text = _extract_text_direct(pdf_file['file_path'])
-                
-                # If direct text extraction yields little content, use OCR
-                if len(direct_text.strip()) < 100 and use_ocr:
-                    logger.info(f"Direct text extraction insufficient, using OCR for {pdf_file['file_name']}")
-                    ocr_text = _extract_text_ocr(pdf_file['file_path'], reader)
-                    extracted_text = ocr_text
-                    extraction_method = "ocr"
-                else:
-                    extracted_text = direct_text
-                    extraction_method = "direct"
-            
-            extracted_texts.append({
-                "file_name": pdf_file['file_name'],
-                "file_path": pdf_file['file_path'],
-                "extracted_text": extracted_text,
-                "extraction_method": extraction_method,
-                "text_length": len(extracted_text),
-                "source": pdf_file.get('source', 'unknown'),
-                "original_metadata": pdf_file
-            })
-            
-        except Exception as e:
-            logger.error(f"Error processing PDF {pdf_file['file_name']}: {e}")
-            extracted_texts.append({
-                "file_name": pdf_file['file_name'],
-                "file_path": pdf_file['file_path'],
-                "extracted_text": "",
-                "extraction_method": "error",
-                "text_length": 0,
-                "error": str(e),
-                "source": pdf_file.get('source', 'unknown'),
-                "original_metadata": pdf_file
-            })
+        # The worker checkpointed the first copy of each file; later copies
+        # get their own so the next run skips them without reading them
+        if (
+            key in extracted_keys
+            and key.startswith(_DIGEST_PREFIX)
+            and result["extraction_method"] not in ("error", "text")
+        ):
+            checkpoint = _checkpoint_path(pdf_file, use_ocr, languages)
+            if checkpoint is not None:
+                _write_checkpoint(checkpoint, _content_cache_key(key, use_ocr, languages))
+        extracted_keys.add(key)
+        
+        extracted_texts.append({
+            **result,
+            "file_name": pdf_file['file_name'],
+            "file_path": pdf_file['file_path'],
+            "source": pdf_file.get('source', 'unknown'),
+            "original_metadata": pdf_file
+        })
+    
+    if len(unique_files) < len(pdf_files):
+        logger.info(f"Skipped {len(pdf_files) - len(unique_files)} duplicate files")
     
     logger.info(f"Successfully processed {len(extracted_texts)} PDF files")
     return extracted_texts
 
 
-def _extract_text_direct(pdf_path: str) -> str:
+def _ocr_pool(max_workers: int) -> ProcessPoolExecutor:
+    """Return the process-wide OCR worker pool, resized if needed"""
+    global _pool, _pool_workers
+    with _pool_lock:
+        if _pool is not None and _pool_workers != max_workers:
+            _pool.shutdown()
+            _pool = None
+        if _pool is None:
+            torch_threads = max(1, (os.cpu_count() or 1) // max_workers)
+            _pool = process_pool(max_workers, initializer=_init_ocr_worker, initargs=(torch_threads,))
+            _pool_workers = max_workers
+        return _pool
+
+
+def _init_ocr_worker(torch_threads: int) -> None:
+    """OCR pool initializer; applied when the worker's reader loads torch"""
+    global _torch_threads
+    _torch_threads = torch_threads
+
+
+def _default_ocr_workers() -> int:
+    """OCR_MAX_WORKERS, or the CPU count capped so every worker's models fit in memory"""
+    configured = os.getenv("OCR_MAX_WORKERS")
+    if configured:
+        return max(1, int(configured))
+    
+    cpus = os.cpu_count() or 1
+    try:
+        memory = os.sysconf("SC_PHYS_PAGES") * os.sysconf("SC_PAGE_SIZE")
+    except (AttributeError, ValueError, OSError):
+        return cpus
+    return max(1, min(cpus, memory // OCR_WORKER_MEMORY))
+
+
+def _shutdown_ocr_pool() -> None:
+    """Stop the OCR worker pool so the next run creates a new one"""
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown(wait=False)
+            _pool = None
+
+
+@lru_cache(maxsize=1)
+def _cuda_available() -> bool:
+    """Whether EasyOCR would run on a GPU, without importing torch when it is missing"""
+    if util.find_spec("torch") is None:
+        return False
+    import torch
+    return torch.cuda.is_available()
+
+
+@lru_cache(maxsize=4)
+def _get_reader(languages: tuple):
+    """
+    Return this process's EasyOCR reader for the given languages
+    
+    Readers stay loaded for as long as the process does: the persistent OCR
+    pool's workers on CPU, or the step's own process on GPU.
+    """
+    logger.info(f"Initializing EasyOCR reader for languages: {list(languages)}")
+    # Imported here because easyocr pulls in torch, which text-based PDFs never need
+    import easyocr
+    import torch
+    if _torch_threads is not None:
+        torch.set_num_threads(_torch_threads)
+    use_gpu = torch.cuda.is_available()
+    # quantize applies dynamic int8 quantization to the CPU models; EasyOCR
+    # has no FP16 switch for GPU inference. Rendered pages mostly share a
+    # size, so cuDNN can keep the fastest kernels it benchmarks.
+    return easyocr.Reader(
+        list(languages),
+        gpu=use_gpu,
+        quantize=env_bool("OCR_QUANTIZE", True),
+        cudnn_benchmark=use_gpu
+    )
+
+
+def _process_pdf(pdf_file: Dict[str, Any], use_ocr: bool, languages: tuple) -> Dict[str, Any]:
+    """Extract a single PDF file, reusing its checkpoint from an earlier run"""
+    checkpoint = _checkpoint_path(pdf_file, use_ocr, languages)
+    
+    if checkpoint is not None:
+        entry = _read_cache_entry(checkpoint)
+        # The text lives in the OCR cache; a pruned entry means re-extracting
+        cached = _ocr_cache_get(entry["ocr_cache_key"]) if entry and "ocr_cache_key" in entry else None
+        if cached is not None:
+            logger.info(f"Reusing extracted text for {pdf_file['file_name']}")
+            return _extraction_result(pdf_file, *cached)
+    
+    result, cache_key = _extract_pdf(pdf_file, use_ocr, languages)
+    
+    # Failed extractions are retried on the next run
+    if checkpoint is not None and cache_key is not None and result["extraction_method"] != "error":
+        _write_checkpoint(checkpoint, cache_key)
+    return result
+
+
+def _extract_pdf(pdf_file: Dict[str, Any], use_ocr: bool, languages: tuple) -> Tuple[Dict[str, Any], Optional[str]]:
+    """Extract text and metadata from a single PDF file, with its OCR cache key"""
+    logger.info(f"Processing PDF: {pdf_file['file_name']}")
+    cache_key = None
+    
+    try:
+        # Check if it's a text file
+        if pdf_file['file_path'].endswith('.txt'):
+            with _open_pdf(pdf_file['file_path']) as f:
+                extracted_text = io.TextIOWrapper(f, encoding='utf-8').read()
+            extraction_method = "text"
+        else:
+            # S3 objects are fetched once here and every pass below reads
+            # the same in-memory copy
+            with _open_pdf(pdf_file['file_path']) as pdf:
+                cache_key = _ocr_cache_key(pdf, pdf_file.get('content_hash'), use_ocr, languages)
+                cached = _ocr_cache_get(cache_key)
+                
+                if cached is not None:
+                    logger.info(f"Using cached text for {pdf_file['file_name']}")
+                    extracted_text, extraction_method = cached
+                else:
+                    # First, try to extract text directly from PDF
+                    direct_text = _extract_text_direct(pdf, pdf_file['file_path'])
+                    
+                    # If direct text extraction yields little content, use OCR
+                    if len(direct_text.strip()) < 100 and use_ocr:
+                        logger.info(f"Direct text extraction insufficient, using OCR for {pdf_file['file_name']}")
+                        ocr_text = _extract_text_ocr(pdf, pdf_file['file_path'], _get_reader(languages))
+                        extracted_text = ocr_text
+                        extraction_method = "ocr"
+                    else:
+                        extracted_text = direct_text
+                        extraction_method = "direct"
+                    
+                    _ocr_cache_put(cache_key, extracted_text, extraction_method)
+        
+        return _extraction_result(pdf_file, extracted_text, extraction_method), cache_key
+        
+    except Exception as e:
+        logger.error(f"Error processing PDF {pdf_file['file_name']}: {e}")
+        return {
+            "file_name": pdf_file['file_name'],
+            "file_path": pdf_file['file_path'],
+            "extracted_text": "",
+            "extraction_method": "error",
+            "text_length": 0,
+            "error": str(e),
+            "source": pdf_file.get('source', 'unknown'),
+            "original_metadata": pdf_file
+        }, None
+
+
+def _extraction_result(pdf_file: Dict[str, Any], extracted_text: str, extraction_method: str) -> Dict[str, Any]:
+    """Build the step's result record for a successfully extracted file"""
+    return {
+        "file_name": pdf_file['file_name'],
+        "file_path": pdf_file['file_path'],
+        "extracted_text": extracted_text,
+        "extraction_method": extraction_method,
+        "text_length": len(extracted_text),
+        "source": pdf_file.get('source', 'unknown'),
+        "original_metadata": pdf_file
+    }
+
+
+def _open_pdf(path: str) -> BinaryIO:
+    """Open a local path or an s3://bucket/key URI for binary reading"""
+    if path.startswith("s3://"):
+        bucket, _, key = path[len("s3://"):].partition("/")
+        response = _s3_client().get_object(Bucket=bucket, Key=key)
+        return io.BytesIO(response['Body'].read())
+    return open(path, 'rb')
+
+
+def _s3_client():
+    """Return this process's S3 client"""
+    # boto3 clients are not fork-safe, so a forked worker builds its own
+    # rather than reusing one inherited from the parent
+    return _s3_client_for(os.getpid())
+
+
+@lru_cache(maxsize=1)
+def _s3_client_for(pid: int):
+    """Create the S3 client for the process with the given ID"""
+    import boto3
+    return boto3.client('s3')
+
+
+@lru_cache(maxsize=1)
+def _extractor_versions() -> str:
+    """Versions of the extraction libraries, so upgrades invalidate cached text"""
+    versions = []
+    for package in ("PyPDF2", "pypdfium2", "easyocr"):
+        try:
+            versions.append(f"{package}={metadata.version(package)}")
+        except metadata.PackageNotFoundError:
+            versions.append(f"{package}=none")
+    return ";".join(versions)
+
+
+def _dedupe_key(pdf_file: Dict[str, Any], use_ocr: bool, languages: tuple) -> str:
+    """
+    Key identifying a file's content for deduplication
+    
+    Local files are only read when they have no checkpoint, i.e. when they
+    are about to be extracted anyway; the digest is then reused as their OCR
+    cache key. S3 objects are identified by their ETag without downloading.
+    """
+    if pdf_file.get('content_hash'):
+        return pdf_file['content_hash']
+    
+    path = pdf_file['file_path']
+    checkpoint = _checkpoint_path(pdf_file, use_ocr, languages)
+    if path.startswith("s3://") or (checkpoint is not None and checkpoint.exists()):
+        return path
+    
+    try:
+        with open(path, 'rb') as f:
+            return _DIGEST_PREFIX + _hash_file(f)
+    except OSError:
+        # Left to the extraction to report
+        return path
+
+
+def _hash_file(file: BinaryIO) -> str:
+    """Hash a file's contents in 64 KiB chunks"""
+    digest = blake2b(digest_size=20)
+    file.seek(0)
+    for chunk in iter(lambda: file.read(64 * 1024), b""):
+        digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _ocr_cache_key(pdf: BinaryIO, content_hash: Optional[str], use_ocr: bool, languages: tuple) -> str:
+    """Hash the PDF content together with everything that affects extraction"""
+    if content_hash is None or not content_hash.startswith(_DIGEST_PREFIX):
+        content_hash = _DIGEST_PREFIX + _hash_file(pdf)
+    return _content_cache_key(content_hash, use_ocr, languages)
+
+
+def _content_cache_key(content_hash: str, use_ocr: bool, languages: tuple) -> str:
+    """OCR cache key for a content digest and extraction settings"""
+    key = f"{content_hash}|{_extractor_versions()}|ocr={use_ocr}|{','.join(languages)}"
+    return blake2b(key.encode(), digest_size=20).hexdigest()
+
+
+def _checkpoint_path(pdf_file: Dict[str, Any], use_ocr: bool, languages: tuple) -> Optional[Path]:
+    """Checkpoint location for a file, or None when its metadata cannot identify it"""
+    if pdf_file.get('file_size') is None or pdf_file.get('last_modified') is None:
+        return None
+    
+    key = (
+        f"{pdf_file['file_path']}|{pdf_file['file_size']}|{pdf_file['last_modified']}"
+        f"|{_extractor_versions()}|ocr={use_ocr}|{','.join(languages)}"
+    )
+    return CHECKPOINT_DIR / f"{blake2b(key.encode(), digest_size=20).hexdigest()}.json"
+
+
+def _write_checkpoint(checkpoint: Path, cache_key: str) -> None:
+    """Point a file's checkpoint at the OCR cache entry holding its text"""
+    _write_cache_entry(checkpoint, {"ocr_cache_key": cache_key})
+
+
+def _ocr_cache_get(cache_key: str) -> Optional[Tuple[str, str]]:
+    """Return cached (text, extraction method) for a key, if present"""
+    entry = _read_cache_entry(OCR_CACHE_DIR / f"{cache_key}.json")
+    if entry is None:
+        return None
+    return entry["text"], entry["method"]
+
+
+def _ocr_cache_put(cache_key: str, text: str, method: str) -> None:
+    """Store extracted text under its content key"""
+    _write_cache_entry(OCR_CACHE_DIR / f"{cache_key}.json", {"text": text, "method": method})
+
+
+def _read_cache_entry(path: Path) -> Optional[Dict[str, Any]]:
+    """Load a JSON cache entry, treating missing or corrupt files as a miss"""
+    try:
+        entry = orjson.loads(path.read_bytes())
+        # Mark the entry as used so age pruning keeps it
+        os.utime(path)
+        return entry
+    except (OSError, ValueError):
+        return None
+
+
+def _write_cache_entry(path: Path, entry: Dict[str, Any]) -> None:
+    """Store a JSON cache entry; failures only cost a cache miss next time"""
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        # Write then rename so concurrent workers never read a partial entry
+        tmp_path = path.with_suffix(f".{os.getpid()}.tmp")
+        tmp_path.write_bytes(orjson.dumps(entry))
+        os.replace(tmp_path, path)
+    except (OSError, TypeError) as e:
+        logger.warning(f"Could not write cache entry {path.name}: {e}")
+
+
+def _prune_cache() -> None:
+    """Delete OCR cache entries and checkpoints unused for CACHE_MAX_AGE"""
+    cutoff = time.time() - CACHE_MAX_AGE
+    removed = 0
+    for directory in (OCR_CACHE_DIR, CHECKPOINT_DIR):
+        try:
+            entries = list(os.scandir(directory))
+        except OSError:
+            continue
+        for entry in entries:
+            try:
+                if entry.is_file() and entry.stat().st_mtime < cutoff:
+                    os.remove(entry.path)
+                    removed += 1
+            except OSError:
+                # Removed concurrently, or not ours to delete
+                pass
+    if removed:
+        logger.info(f"Pruned {removed} stale cache entries")
+
+
+def _extract_text_direct(pdf: BinaryIO, pdf_path: str) -> str:
     """Extract text directly from PDF using PyPDF2"""
-    text = ""
+    import PyPDF2
+    
+    pages = []
     
     try:
-        with open(pdf_path, 'rb') as file:
-            pdf_reader = PyPDF2.PdfReader(file)
-            
-            for page_num in range(len(pdf_reader.pages)):
-                page = pdf_reader.pages[page_num]
-                text += page.extract_text() + "\n"
+        pdf.seek(0)
+        pdf_reader = PyPDF2.PdfReader(pdf)
+        
+        for page in pdf_reader.pages:
+            pages.append(page.extract_text() or "")
                 
     except Exception as e:
         logger.warning(f"Direct text extraction failed for {pdf_path}: {e}")
         
-    return text
+    return "\n".join(pages)
 
 
-def _extract_text_ocr(pdf_path: str, reader) -> str:
+def _extract_text_ocr(pdf: BinaryIO, pdf_path: str, reader) -> str:
     """Extract text from PDF using OCR"""
-    text = ""
-    
-    if pdf2image is None:
-        logger.error("pdf2image is not available. Install it with: pip install pdf2image")
-        raise ImportError("pdf2image is required for OCR functionality")
+    try:
+        import pypdfium2 as pdfium
+    except ImportError:
+        logger.error("pypdfium2 is not available. Install it with: pip install pypdfium2")
+        raise ImportError("pypdfium2 is required for OCR functionality")
     
     try:
-        # Convert PDF to images
-        images = pdf2image.convert_from_path(pdf_path)
-        
-        for i, image in enumerate(images):
-            logger.info(f"Processing page {i+1} with OCR")
+        # Render pages in-process with PDFium. PDFium is not thread-safe, so
+        # pages are rendered one after another; PDFs already run in parallel
+        # worker processes.
+        pdf.seek(0)
+        document = pdfium.PdfDocument(pdf)
+        try:
+            page_count = len(document)
+            logger.info(f"Processing {page_count} pages with OCR")
             
-            # Use EasyOCR to extract text
-            results = reader.readtext(image, detail=0)
-            page_text = " ".join(results)
-            text += page_text + "\n"
+            page_results = []
+            for start in range(0, page_count, OCR_PAGES_PER_BATCH):
+                pages = [
+                    np.asarray(document[index].render(scale=OCR_RENDER_SCALE).to_pil())
+                    for index in range(start, min(start + OCR_PAGES_PER_BATCH, page_count))
+                ]
+                page_results.extend(_ocr_pages(pages, reader))
+        finally:
+            document.close()
             
     except Exception as e:
         logger.error(f"OCR extraction failed for {pdf_path}: {e}")
         raise
         
-    return text
+    return "\n".join(" ".join(results) for results in page_results)
+
+
+def _ocr_pages(pages: List[np.ndarray], reader) -> List[List[str]]:
+    """Recognize the text of a slice of rendered pages"""
+    # Batch the pages through the recognizer in one call when they share a
+    # size; readtext_batched cannot stack differently sized pages
+    if len({page.shape for page in pages}) == 1:
+        return reader.readtext_batched(pages, batch_size=OCR_BATCH_SIZE, detail=0)
+    return [reader.readtext(page, batch_size=OCR_BATCH_SIZE, detail=0) for page in pages]
@@ -5,20 +5,162 @@ This step parses insurance policy fields from extracted text using
 regular expressions and NLP techniques with spaCy.
 """
 
+import copy
+import functools
+import os
 import re
-from typing import List, Dict, Any, Optional
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Dict, Any, Match, Optional, Pattern, Tuple
 from datetime import datetime
 import spacy
+try:
+    import hyperscan
+except ImportError:
+    hyperscan = None
 from zenml import step
 from zenml.logger import get_logger
+from utils.concurrency import map_documents
 
 logger = get_logger(__name__)
 
+# Longest gap allowed between a field's keyword and its value in the patterns
+# that span lines, so a keyword without a value is not chased to the end of
+# the text
+_MAX_FIELD_GAP = 200
+
+# Field patterns are compiled once at import and shared by every document.
+# Each pattern is paired with the literal keyword every match starts with,
+# so it only has to be searched from that keyword's first occurrence.
+_POLICY_NUMBER_RES = [
+    (anchor, re.compile(pattern, re.IGNORECASE)) for anchor, pattern in (
+        ("policy", r"policy\s*(?:no|number|#)?\s*:?\s*([A-Z0-9\-]+)"),
+        ("pol", r"pol\s*(?:no|number|#)?\s*:?\s*([A-Z0-9\-]+)"),
+        ("certificate", r"certificate\s*(?:no|number|#)?\s*:?\s*([A-Z0-9\-]+)")
+    )
+]
+
+# Common date patterns
+_DATE_PATTERN = "|".join([
+    r"\d{1,2}[\/\-]\d{1,2}[\/\-]\d{2,4}",
+    r"\d{1,2}\s+(jan|feb|mar|apr|may|jun|jul|aug|sep|oct|nov|dec)\w*\s+\d{2,4}",
+    r"(jan|feb|mar|apr|may|jun|jul|aug|sep|oct|nov|dec)\w*\s+\d{1,2},?\s+\d{2,4}"
+])
+
+_EFFECTIVE_DATE_RES = [
+    (anchor, re.compile(pattern, re.IGNORECASE)) for anchor, pattern in (
+        ("effective", r"effective\s*(?:date)?\s*:?\s*(" + _DATE_PATTERN + ")"),
+        ("policy", r"policy\s*period\s*:?\s*(" + _DATE_PATTERN + ")")
+    )
+]
+
+_EXPIRATION_DATE_RES = [
+    (anchor, re.compile(pattern, re.IGNORECASE)) for anchor, pattern in (
+        ("expir", r"expir(?:ation|es?)\s*(?:date)?\s*:?\s*(" + _DATE_PATTERN + ")"),
+        ("expir", r"expires?\s*:?\s*(" + _DATE_PATTERN + ")")
+    )
+]
+
+_INSURANCE_COMPANY_RES = [
+    (anchor, re.compile(pattern, re.IGNORECASE)) for anchor, pattern in (
+        ("company", r"company\s*:?\s*([A-Z][A-Za-z\s&.,]+(?:insurance|ins|assurance|mutual|company))"),
+        ("insurer", r"insurer\s*:?\s*([A-Z][A-Za-z\s&.,]+(?:insurance|ins|assurance|mutual|company))"),
+        ("carrier", r"carrier\s*:?\s*([A-Z][A-Za-z\s&.,]+(?:insurance|ins|assurance|mutual|company))")
+    )
+]
+
+_INSURED_NAME_RES = [
+    (anchor, re.compile(pattern, re.IGNORECASE)) for anchor, pattern in (
+        ("insured", r"insured\s*:?\s*([A-Z][A-Za-z\s&.,\-]+)"),
+        ("named", r"named\s*insured\s*:?\s*([A-Z][A-Za-z\s&.,\-]+)")
+    )
+]
+
+# Coverage limits, keyed by coverage type. The gap to the amount cannot
+# contain a "$", so it is the first amount after the keyword, and it is at
+# most _MAX_FIELD_GAP characters long. Each type is searched on its own:
+# sre scans a single keyword pattern several times faster than an
+# alternation of all three.
+_COVERAGE_LIMIT_RES = [
+    (coverage, anchor, re.compile(keyword + rf"[^$]{{0,{_MAX_FIELD_GAP}}}(\$[\d,]+(?:\s*\/\s*\$[\d,]+)*)", re.IGNORECASE))
+    for coverage, anchor, keyword in (
+        ("general_liability", "general", r"general\s*liability"),
+        ("professional_liability", "professional", r"professional\s*liability"),
+        ("workers_compensation", "worker", r"workers?\s*comp(?:ensation)?")
+    )
+]
+
+_CERTIFICATE_HOLDER_RES = [
+    (anchor, re.compile(pattern, re.IGNORECASE)) for anchor, pattern in (
+        ("certificate", r"certificate\s*holder\s*:?\s*([A-Z][A-Za-z\s&.,\-]+)"),
+        ("holder", r"holder\s*:?\s*([A-Z][A-Za-z\s&.,\-]+)")
+    )
+]
+
+_ADDITIONAL_INSURED_RES = [("additional", re.compile(r"additional\s*insured\s*:?\s*([A-Z][A-Za-z\s&.,\-]+)", re.IGNORECASE))]
+
+_CANCELLATION_RES = [(
+    "cancellation",
+    re.compile(rf"cancellation.{{0,{_MAX_FIELD_GAP}}}?(\d+\s*days?\s*written\s*notice)", re.IGNORECASE | re.DOTALL)
+)]
+
+# Literals that must also appear after the keyword for the coverage and
+# cancellation patterns to match, so those searches are skipped without them
+_AMOUNT_LITERAL = "$"
+_NOTICE_KEYWORD = "notice"
+
+# Every field keyword, for the hyperscan pre-scan
+_ANCHORS = sorted(
+    {anchor for patterns in (
+        _POLICY_NUMBER_RES, _EFFECTIVE_DATE_RES, _EXPIRATION_DATE_RES,
+        _INSURANCE_COMPANY_RES, _INSURED_NAME_RES, _CERTIFICATE_HOLDER_RES,
+        _ADDITIONAL_INSURED_RES, _CANCELLATION_RES
+    ) for anchor, _ in patterns}
+    | {anchor for _, anchor, _ in _COVERAGE_LIMIT_RES}
+    | {_NOTICE_KEYWORD},
+    key=lambda anchor: (-len(anchor), anchor)
+)
+# Hyperscan finds all keywords in one pass with SIMD literal prefilters.
+# Without it the field patterns simply search the whole text: an equivalent
+# pure-re pre-scan has to visit every position of the text and costs more
+# than the searches it would narrow down.
+_ANCHOR_DB = None
+if hyperscan is not None:
+    _ANCHOR_DB = hyperscan.Database(mode=hyperscan.HS_MODE_BLOCK)
+    _ANCHOR_DB.compile(
+        expressions=[anchor.encode() for anchor in _ANCHORS],
+        ids=list(range(len(_ANCHORS))),
+        elements=len(_ANCHORS),
+        flags=[hyperscan.HS_FLAG_CASELESS] * len(_ANCHORS)
+    )
+
+
+# Non-ASCII characters that re.IGNORECASE matches to ASCII letters, mapped
+# to those letters for hyperscan; every other non-ASCII character becomes a
+# "?", one byte per character, so offsets stay the same
+_ASCII_CASE_FOLDS = (("\u0130", "i"), ("\u0131", "i"), ("\u017f", "s"), ("\u212a", "k"))
+
+
+# Distinct document texts whose parsed fields are kept per process;
+# re-submitted certificates and reruns share their boilerplate verbatim
+PARSE_CACHE_SIZE = 256
+
+# Batches smaller than this are parsed in-process
+PARALLEL_MIN_DOCUMENTS = 64
+
+# Documents per spaCy batch
+SPACY_BATCH_SIZE = int(os.getenv("SPACY_BATCH_SIZE", 32))
+
+# Pipeline components whose output is never read; only NER entities are
+# used, and NER keeps its own tok2vec in the stock English pipelines
+_UNUSED_PIPES = ("tagger", "parser", "attribute_ruler", "lemmatizer")
+
 
 @step
 def parse_insurance_fields(
     extracted_texts: List[Dict[str, Any]],
-    nlp_model: str = "en_core_web_sm"
+    nlp_model: str = "en_core_web_sm",
+    lazy_nlp: bool = True,
+    max_workers: Optional[int] = None
 ) -> List[Dict[str, Any]]:
     """
     Parse insurance policy fields from extracted text
@@ -26,268 +168,297 @@ def parse_insurance_fields(
     Args:
         extracted_texts: List of extracted text dictionaries
         nlp_model: spaCy model name for NLP processing
+        lazy_nlp: Only run spaCy on documents whose regex parsing missed
+            the insurance company or insured name
+        max_workers: Maximum number of processes for regex parsing (default: CPU count)
         
     Returns:
         List of dictionaries containing parsed insurance fields
     """
     
-    parsed_results = []
+    # Regex parsing is CPU-bound pure Python, so larger batches are split
+    # across processes; small ones are not worth the worker start-up
+    workers = max_workers if len(extracted_texts) >= PARALLEL_MIN_DOCUMENTS else 1
+    parsed_results = map_documents(
+        _parse_document,
+        extracted_texts,
+        max_workers=workers,
+        executor_cls=ProcessPoolExecutor,
+        chunksize=4
+    )
+    
+    # NER stays in this process so the model is loaded once and batched
+    nlp_results = [
+        result for result in parsed_results
+        if result['parsing_status'] == 'success' and (not lazy_nlp or _needs_nlp(result['parsed_fields']))
+    ]
+    nlp_texts = [result['original_metadata']['extracted_text'] for result in nlp_results]
     
-    # Load spaCy model
-    try:
-        nlp = spacy.load(nlp_model)
-    except OSError:
-        logger.warning(f"spaCy model {nlp_model} not found, using basic parsing")
-        nlp = None
+    if nlp_texts:
+        _enhance_results_with_nlp(nlp_results, nlp_texts, nlp_model)
     
-    for text_data in extracted_texts:
-        logger.info(f"Parsing fields from {text_data['file_name']}")
-        
-        if text_data['extraction_method'] == 'error':
-            parsed_results.append({
-                "file_name": text_data['file_name'],
-                "file_path": text_data['file_path'],
-                "parsed_fields": {},
-                "parsing_status": "error",
-                "error": text_data.get('error', 'Unknown error during text extraction'),
-                "original_metadata": text_data
-            })
-            continue
-        
-        text = text_data['extracted_text']
-        
-        # Parse insurance fields
-        parsed_fields = _parse_insurance_fields(text, nlp)
-        
-        parsed_results.append({
+    logger.info(f"Successfully parsed {len(parsed_results)} documents ({len(nlp_texts)} with NLP)")
+    return parsed_results
+
+
+def _parse_document(text_data: Dict[str, Any]) -> Dict[str, Any]:
+    """Parse the insurance fields of a single extracted document with regex"""
+    logger.info(f"Parsing fields from {text_data['file_name']}")
+    
+    if text_data['extraction_method'] == 'error':
+        return {
             "file_name": text_data['file_name'],
             "file_path": text_data['file_path'],
-            "parsed_fields": parsed_fields,
-            "parsing_status": "success",
+            "parsed_fields": {},
+            "parsing_status": "error",
+            "error": text_data.get('error', 'Unknown error during text extraction'),
             "original_metadata": text_data
-        })
+        }
+    
+    return {
+        "file_name": text_data['file_name'],
+        "file_path": text_data['file_path'],
+        "parsed_fields": _parse_insurance_fields(text_data['extracted_text']),
+        "parsing_status": "success",
+        # Which path parsed the document; set to True when NER runs on it
+        "original_metadata": {**text_data, "nlp_enhanced": False}
+    }
+
+
+def _needs_nlp(fields: Dict[str, Any]) -> bool:
+    """Whether regex parsing missed fields that NER may recover"""
+    return fields.get('insurance_company') is None or fields.get('insured_name') is None
+
+
+def _enhance_results_with_nlp(results: List[Dict[str, Any]], texts: List[str], nlp_model: str) -> None:
+    """Add spaCy NER entities to the parsed fields of the given results"""
+    # Load spaCy model without the components whose output is never read
+    try:
+        nlp = _load_nlp(nlp_model, _UNUSED_PIPES)
+    except OSError:
+        logger.warning(f"spaCy model {nlp_model} not found, using basic parsing")
+        return
     
-    logger.info(f"Successfully parsed {len(parsed_results)} documents")
-    return parsed_results
+    # Run spaCy over all documents in batches; only the NER entities are used
+    try:
+        docs = nlp.pipe(texts, batch_size=SPACY_BATCH_SIZE)
+        for result, doc in zip(results, docs):
+            result['parsed_fields'].update(_enhance_parsing_with_nlp(doc))
+            result['original_metadata']['nlp_enhanced'] = True
+    except Exception as e:
+        logger.warning(f"NLP enhancement failed: {e}")
+
 
+@functools.lru_cache(maxsize=4)
+def _load_nlp(model_name: str, exclude: Tuple[str, ...]):
+    """Load a spaCy pipeline once per process and reuse it across step runs"""
+    return spacy.load(model_name, exclude=list(exclude))
 
-def _parse_insurance_fields(text: str, nlp=None) -> Dict[str, Any]:
-    """Parse insurance fields from text using regex and NLP"""
+
+def _parse_insurance_fields(text: str) -> Dict[str, Any]:
+    """Parse insurance fields from text using regex"""
+    # The cached fields are shared across calls and NER adds to the
+    # returned dict, so hand out a copy
+    return copy.deepcopy(_parse_fields_cached(text))
+
+
+@functools.lru_cache(maxsize=PARSE_CACHE_SIZE)
+def _parse_fields_cached(text: str) -> Dict[str, Any]:
+    """Parse the fields of each distinct text once per process"""
     
     fields = {}
     
+    # Find every field keyword in a single pass over the text, when possible
+    anchors = _locate_anchors(text)
+    
     # Parse policy number
-    fields['policy_number'] = _extract_policy_number(text)
+    fields['policy_number'] = _extract_policy_number(text, anchors)
     
     # Parse policy dates
-    fields['policy_period'] = _extract_policy_period(text)
+    fields['policy_period'] = _extract_policy_period(text, anchors)
     
     # Parse insurance company
-    fields['insurance_company'] = _extract_insurance_company(text)
+    fields['insurance_company'] = _extract_insurance_company(text, anchors)
     
     # Parse insured name
-    fields['insured_name'] = _extract_insured_name(text)
+    fields['insured_name'] = _extract_insured_name(text, anchors)
     
     # Parse coverage limits
-    fields['coverage_limits'] = _extract_coverage_limits(text)
+    fields['coverage_limits'] = _extract_coverage_limits(text, anchors)
     
     # Parse certificate holder
-    fields['certificate_holder'] = _extract_certificate_holder(text)
+    fields['certificate_holder'] = _extract_certificate_holder(text, anchors)
     
     # Parse additional insureds
-    fields['additional_insureds'] = _extract_additional_insureds(text)
+    fields['additional_insureds'] = _extract_additional_insureds(text, anchors)
     
     # Parse cancellation clause
-    fields['cancellation_clause'] = _extract_cancellation_clause(text)
-    
-    # Use NLP for enhanced parsing if available
-    if nlp:
-        fields.update(_enhance_parsing_with_nlp(text, nlp))
+    fields['cancellation_clause'] = _extract_cancellation_clause(text, anchors)
     
     return fields
 
 
-def _extract_policy_number(text: str) -> Optional[str]:
-    """Extract policy number from text"""
-    patterns = [
-        r"policy\s*(?:no|number|#)?\s*:?\s*([A-Z0-9\-]+)",
-        r"pol\s*(?:no|number|#)?\s*:?\s*([A-Z0-9\-]+)",
-        r"certificate\s*(?:no|number|#)?\s*:?\s*([A-Z0-9\-]+)"
-    ]
+def _locate_anchors(text: str) -> Optional[Dict[str, int]]:
+    """
+    Map each field keyword present in the text to its first position
     
-    for pattern in patterns:
-        match = re.search(pattern, text, re.IGNORECASE)
+    Returns None when the keywords were not located, in which case every
+    field pattern searches the whole text.
+    """
+    if _ANCHOR_DB is not None:
+        return _scan_anchors(text)
+    return None
+
+
+def _scan_anchors(text: str) -> Dict[str, int]:
+    """Hyperscan version of _locate_anchors"""
+    anchors = {}
+    
+    def on_match(anchor_id: int, start: int, end: int, flags: int, context: Any) -> None:
+        anchor = _ANCHORS[anchor_id]
+        # Literal matches are reported in end order, so the first report is
+        # the earliest occurrence
+        if anchor not in anchors:
+            anchors[anchor] = end - len(anchor)
+    
+    # Hyperscan folds ASCII case only and reports byte offsets, so the text
+    # is scanned as one ASCII byte per character
+    if not text.isascii():
+        # str.replace is much faster than str.translate for a few characters
+        for char, letter in _ASCII_CASE_FOLDS:
+            if char in text:
+                text = text.replace(char, letter)
+    data = text.encode('ascii', 'replace')
+    
+    _ANCHOR_DB.scan(data, match_event_handler=on_match)
+    return anchors
+
+
+def _anchor_position(anchors: Optional[Dict[str, int]], anchor: str) -> Optional[int]:
+    """Position to search from for a keyword, or None when it is absent"""
+    if anchors is None:
+        return 0
+    return anchors.get(anchor)
+
+
+def _search_fields(patterns: List[Tuple[str, Pattern]], text: str, anchors: Optional[Dict[str, int]]) -> Optional[Match]:
+    """
+    Return the first pattern's match, trying patterns in priority order
+    
+    No match can start before its keyword's first occurrence, so each
+    pattern is searched from there and patterns whose keyword is absent
+    are skipped.
+    """
+    for anchor, pattern in patterns:
+        position = _anchor_position(anchors, anchor)
+        if position is None:
+            continue
+        match = pattern.search(text, position)
         if match:
-            return match.group(1).strip()
+            return match
     
     return None
 
 
-def _extract_policy_period(text: str) -> Dict[str, Optional[str]]:
+def _extract_policy_number(text: str, anchors: Optional[Dict[str, int]]) -> Optional[str]:
+    """Extract policy number from text"""
+    match = _search_fields(_POLICY_NUMBER_RES, text, anchors)
+    return match.group(1).strip() if match else None
+
+
+def _extract_policy_period(text: str, anchors: Optional[Dict[str, int]]) -> Dict[str, Optional[str]]:
     """Extract policy effective and expiration dates"""
     period = {"effective_date": None, "expiration_date": None}
     
-    # Common date patterns
-    date_patterns = [
-        r"\d{1,2}[\/\-]\d{1,2}[\/\-]\d{2,4}",
-        r"\d{1,2}\s+(jan|feb|mar|apr|may|jun|jul|aug|sep|oct|nov|dec)\w*\s+\d{2,4}",
-        r"(jan|feb|mar|apr|may|jun|jul|aug|sep|oct|nov|dec)\w*\s+\d{1,2},?\s+\d{2,4}"
-    ]
-    
     # Look for effective date
-    effective_patterns = [
-        r"effective\s*(?:date)?\s*:?\s*(" + "|".join(date_patterns) + ")",
-        r"policy\s*period\s*:?\s*(" + "|".join(date_patterns) + ")"
-    ]
-    
-    for pattern in effective_patterns:
-        match = re.search(pattern, text, re.IGNORECASE)
-        if match:
-            period["effective_date"] = match.group(1).strip()
-            break
+    match = _search_fields(_EFFECTIVE_DATE_RES, text, anchors)
+    if match:
+        period["effective_date"] = match.group(1).strip()
     
     # Look for expiration date
-    expiration_patterns = [
-        r"expir(?:ation|es?)\s*(?:date)?\s*:?\s*(" + "|".join(date_patterns) + ")",
-        r"expires?\s*:?\s*(" + "|".join(date_patterns) + ")"
-    ]
-    
-    for pattern in expiration_patterns:
-        match = re.search(pattern, text, re.IGNORECASE)
-        if match:
-            period["expiration_date"] = match.group(1).strip()
-            break
+    match = _search_fields(_EXPIRATION_DATE_RES, text, anchors)
+    if match:
+        period["expiration_date"] = match.group(1).strip()
     
     return period
 
 
-def _extract_insurance_company(text: str) -> Optional[str]:
+def _extract_insurance_company(text: str, anchors: Optional[Dict[str, int]]) -> Optional[str]:
     """Extract insurance company name"""
-    patterns = [
-        r"company\s*:?\s*([A-Z][A-Za-z\s&.,]+(?:insurance|ins|assurance|mutual|company))",
-        r"insurer\s*:?\s*([A-Z][A-Za-z\s&.,]+(?:insurance|ins|assurance|mutual|company))",
-        r"carrier\s*:?\s*([A-Z][A-Za-z\s&.,]+(?:insurance|ins|assurance|mutual|company))"
-    ]
-    
-    for pattern in patterns:
-        match = re.search(pattern, text, re.IGNORECASE)
-        if match:
-            return match.group(1).strip()
-    
-    return None
+    match = _search_fields(_INSURANCE_COMPANY_RES, text, anchors)
+    return match.group(1).strip() if match else None
 
 
-def _extract_insured_name(text: str) -> Optional[str]:
+def _extract_insured_name(text: str, anchors: Optional[Dict[str, int]]) -> Optional[str]:
     """Extract insured party name"""
-    patterns = [
-        r"insured\s*:?\s*([A-Z][A-Za-z\s&.,\-]+)",
-        r"named\s*insured\s*:?\s*([A-Z][A-Za-z\s&.,\-]+)"
-    ]
-    
-    for pattern in patterns:
-        match = re.search(pattern, text, re.IGNORECASE)
-        if match:
-            return match.group(1).strip()
-    
-    return None
+    match = _search_fields(_INSURED_NAME_RES, text, anchors)
+    return match.group(1).strip() if match else None
 
 
-def _extract_coverage_limits(text: str) -> Dict[str, str]:
+def _extract_coverage_limits(text: str, anchors: Optional[Dict[str, int]]) -> Dict[str, str]:
     """Extract coverage limits"""
     limits = {}
     
-    # General liability limits
-    gl_pattern = r"general\s*liability.*?(\$[\d,]+(?:\s*\/\s*\$[\d,]+)*)"
-    match = re.search(gl_pattern, text, re.IGNORECASE | re.DOTALL)
-    if match:
-        limits["general_liability"] = match.group(1)
-    
-    # Professional liability limits
-    pl_pattern = r"professional\s*liability.*?(\$[\d,]+(?:\s*\/\s*\$[\d,]+)*)"
-    match = re.search(pl_pattern, text, re.IGNORECASE | re.DOTALL)
-    if match:
-        limits["professional_liability"] = match.group(1)
+    # Every limit is a dollar amount following its coverage keyword, so
+    # keywords first found after the last amount cannot match
+    last_amount = text.rfind(_AMOUNT_LITERAL)
     
-    # Workers compensation
-    wc_pattern = r"workers?\s*comp(?:ensation)?.*?(\$[\d,]+(?:\s*\/\s*\$[\d,]+)*)"
-    match = re.search(wc_pattern, text, re.IGNORECASE | re.DOTALL)
-    if match:
-        limits["workers_compensation"] = match.group(1)
+    for coverage, anchor, pattern in _COVERAGE_LIMIT_RES:
+        position = _anchor_position(anchors, anchor)
+        if position is None or position > last_amount:
+            continue
+        match = pattern.search(text, position)
+        if match:
+            limits[coverage] = match.group(1)
     
     return limits
 
 
-def _extract_certificate_holder(text: str) -> Optional[str]:
+def _extract_certificate_holder(text: str, anchors: Optional[Dict[str, int]]) -> Optional[str]:
     """Extract certificate holder name"""
-    patterns = [
-        r"certificate\s*holder\s*:?\s*([A-Z][A-Za-z\s&.,\-]+)",
-        r"holder\s*:?\s*([A-Z][A-Za-z\s&.,\-]+)"
-    ]
-    
-    for pattern in patterns:
-        match = re.search(pattern, text, re.IGNORECASE)
-        if match:
-            return match.group(1).strip()
-    
-    return None
+    match = _search_fields(_CERTIFICATE_HOLDER_RES, text, anchors)
+    return match.group(1).strip() if match else None
 
 
-def _extract_additional_insureds(text: str) -> List[str]:
+def _extract_additional_insureds(text: str, anchors: Optional[Dict[str, int]]) -> List[str]:
     """Extract additional insured parties"""
-    additional_insureds = []
-    
-    pattern = r"additional\s*insured\s*:?\s*([A-Z][A-Za-z\s&.,\-]+)"
-    matches = re.findall(pattern, text, re.IGNORECASE)
-    
-    for match in matches:
-        additional_insureds.append(match.strip())
-    
-    return additional_insureds
+    insureds = []
+    for anchor, pattern in _ADDITIONAL_INSURED_RES:
+        position = _anchor_position(anchors, anchor)
+        if position is not None:
+            insureds.extend(match.strip() for match in pattern.findall(text, position))
+    return insureds
 
 
-def _extract_cancellation_clause(text: str) -> Optional[str]:
+def _extract_cancellation_clause(text: str, anchors: Optional[Dict[str, int]]) -> Optional[str]:
     """Extract cancellation clause information"""
-    pattern = r"cancellation.*?(\d+\s*days?\s*written\s*notice)"
-    match = re.search(pattern, text, re.IGNORECASE | re.DOTALL)
+    # The clause ends in "days written notice"
+    if _anchor_position(anchors, _NOTICE_KEYWORD) is None:
+        return None
     
-    if match:
-        return match.group(1).strip()
-    
-    return None
+    match = _search_fields(_CANCELLATION_RES, text, anchors)
+    return match.group(1).strip() if match else None
 
 
-def _enhance_parsing_with_nlp(text: str, nlp) -> Dict[str, Any]:
-    """Use spaCy NLP to enhance field extraction"""
-    enhanced_fields = {}
-    
-    try:
-        doc = nlp(text)
-        
-        # Extract organizations
-        organizations = []
-        for ent in doc.ents:
-            if ent.label_ == "ORG":
-                organizations.append(ent.text)
-        
-        enhanced_fields["organizations"] = list(set(organizations))
-        
-        # Extract dates
-        dates = []
-        for ent in doc.ents:
-            if ent.label_ == "DATE":
-                dates.append(ent.text)
-        
-        enhanced_fields["dates"] = dates
-        
-        # Extract money amounts
-        money_amounts = []
-        for ent in doc.ents:
-            if ent.label_ == "MONEY":
-                money_amounts.append(ent.text)
-        
-        enhanced_fields["money_amounts"] = money_amounts
-        
-    except Exception as e:
-        logger.warning(f"NLP enhancement failed: {e}")
-    
-    return enhanced_fields
+def _enhance_parsing_with_nlp(doc) -> Dict[str, Any]:
+    """Use spaCy NER entities to enhance field extraction"""
+    organizations = set()
+    dates = []
+    money_amounts = []
+    
+    # Sort organizations, dates and money amounts in a single pass
+    for ent in doc.ents:
+        label = ent.label_
+        if label == "ORG":
+            organizations.add(ent.text.strip())
+        elif label == "DATE":
+            dates.append(ent.text)
+        elif label == "MONEY":
+            money_amounts.append(ent.text)
+    
+    return {
+        # Sorted so reports for the same document are identical across runs
+        "organizations": sorted(organizations),
+        "dates": dates,
+        "money_amounts": money_amounts
+    }
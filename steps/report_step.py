@@ -5,11 +5,10 @@ This step generates compliance validation reports in JSON and CSV format
 based on the compliance validation results.
 """
 
-import os
-import json
 import csv
-from typing import List, Dict, Any
+from typing import Any, Dict, List, Tuple
 from pathlib import Path
+import orjson
 from zenml import step
 from zenml.logger import get_logger
 
@@ -32,86 +31,83 @@ def generate_compliance_report(
     logger.info("Generating compliance reports...")
     
     # Ensure output directory exists
-    Path(output_path).mkdir(parents=True, exist_ok=True)
+    output_dir = Path(output_path)
+    output_dir.mkdir(parents=True, exist_ok=True)
     
     # JSON Report
-    json_report_path = os.path.join(output_path, "compliance_report.json")
-    with open(json_report_path, 'w') as json_file:
-        json.dump(compliance_results, json_file, indent=2)
+    json_report_path = output_dir / "compliance_report.json"
+    _write_json_report(compliance_results, json_report_path)
     logger.info(f"JSON compliance report saved to {json_report_path}")
     
     # CSV Report
-    csv_report_path = os.path.join(output_path, "compliance_report.csv")
+    csv_report_path = output_dir / "compliance_report.csv"
     _generate_csv_report(compliance_results, csv_report_path)
     logger.info(f"CSV compliance report saved to {csv_report_path}")
 
 
-def _generate_csv_report(compliance_results: List[Dict[str, Any]], csv_report_path: str) -> None:
+def _write_json_report(compliance_results: List[Dict[str, Any]], json_report_path: Path) -> None:
+    """Write the JSON report"""
+    json_report_path.write_bytes(orjson.dumps(
+        compliance_results,
+        option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY
+    ))
+
+
+# CSV report columns, in the order _row_from_result produces them
+CSV_FIELDNAMES = (
+    "file_name",
+    "compliance_status",
+    "issues",
+    "warnings",
+    "missing_fields",
+    "policy_expiration"
+)
+
+
+# Write buffer for the CSV report, so large reports are written in few
+# system calls
+CSV_WRITE_BUFFER_SIZE = 1 << 20
+
+
+def _generate_csv_report(compliance_results: List[Dict[str, Any]], csv_report_path: Path) -> None:
     """Generate CSV report from compliance results"""
     
     try:
-        with open(csv_report_path, 'w', newline='') as csvfile:
-            fieldnames = [
-                "file_name",
-                "compliance_status",
-                "issues",
-                "warnings",
-                "missing_fields",
-                "policy_expiration"
-            ]
-            writer = csv.DictWriter(csvfile, fieldnames=fieldnames)
-            writer.writeheader()
-            
-            for result in compliance_results:
-                validation = result.get('validation_results', {})
-                # Flatten issues and warnings for CSV
-                issues = _flatten_issues_warnings(validation)
-                
-                writer.writerow({
-                    "file_name": result.get("file_name", ""),
-                    "compliance_status": result.get("compliance_status", ""),
-                    "issues": issues.get("issues", ""),
-                    "warnings": issues.get("warnings", ""),
-                    "missing_fields": issues.get("missing_fields", ""),
-                    "policy_expiration": issues.get("policy_expiration", "")
-                })
+        rows = [_row_from_result(result) for result in compliance_results]
+        
+        with csv_report_path.open('w', newline='', buffering=CSV_WRITE_BUFFER_SIZE) as csvfile:
+            writer = csv.writer(csvfile)
+            writer.writerow(CSV_FIELDNAMES)
+            writer.writerows(rows)
     except Exception as e:
         logger.error(f"Error generating CSV report: {e}")
 
 
-def _flatten_issues_warnings(validation: Dict[str, Any]) -> Dict[str, str]:
-    """Flatten issues and warnings into strings for CSV reporting"""
-    
-    issues = []
-    warnings = []
+def _row_from_result(result: Dict[str, Any]) -> Tuple[Any, ...]:
+    """Flatten one compliance result into a CSV row, issues and warnings joined into strings"""
+    validation = result.get('validation_results', {})
     
     required_fields = validation.get("required_fields", {})
-    if required_fields.get("status") == "fail":
-        issues.extend(required_fields.get("missing_fields", []))
-    
     coverage_checks = validation.get("coverage_limits", {})
-    issues.extend([
-        issue.get("message", "")
-        for issue in coverage_checks.get("issues", [])
-    ])
-    
     expiration_check = validation.get("policy_expiration", {})
+    additional_insureds = validation.get("additional_insureds", {})
+    
+    missing_fields = required_fields.get("missing_fields", [])
     exp_status = expiration_check.get("status", "")
-    if exp_status == "fail":
-        issues.append(expiration_check.get("message", ""))
-    elif exp_status == "warning":
-        warnings.append(expiration_check.get("message", ""))
     
-    additional_insureds = validation.get("additional_insureds", {})
-    if additional_insureds.get("status") == "fail":
-        issues.append(additional_insureds.get("message", ""))
+    issues = [
+        *(missing_fields if required_fields.get("status") == "fail" else ()),
+        *(issue.get("message", "") for issue in coverage_checks.get("issues", [])),
+        expiration_check.get("message", "") if exp_status == "fail" else None,
+        additional_insureds.get("message", "") if additional_insureds.get("status") == "fail" else None
+    ]
+    warning = expiration_check.get("message", "") if exp_status == "warning" else None
     
-    return {
-        "issues": "; ".join(issues),
-        "warnings": "; ".join(warnings),
-        "missing_fields": ", ".join(required_fields.get("missing_fields", [])),
-        "policy_expiration": expiration_check.get("expiration_date", "")
-    }
-
-
-
+    return (
+        result.get("file_name", ""),
+        result.get("compliance_status", ""),
+        "; ".join(message for message in issues if message),
+        warning or "",
+        ", ".join(missing_fields),
+        expiration_check.get("expiration_date", "")
+    )
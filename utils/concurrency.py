@@ -0,0 +1,95 @@
+"""
+Concurrency helpers for the COI Compliance Validation Pipeline
+
+COI documents are independent of each other, so the long-running pipeline
+steps (OCR, parsing and Gemini analysis) fan their per-document work out
+over a worker pool and collect the results in input order.
+"""
+
+import logging
+import os
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Callable, Iterable, List, Optional, Tuple, Type, TypeVar
+from config import init_worker_logging, worker_log_queue
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+
+def process_pool(
+    max_workers: int,
+    executor_cls: Type[ProcessPoolExecutor] = ProcessPoolExecutor,
+    initializer: Optional[Callable[..., None]] = None,
+    initargs: Tuple[Any, ...] = ()
+) -> ProcessPoolExecutor:
+    """
+    Create a process pool whose workers log through the parent's log listener
+    
+    Args:
+        max_workers: Number of worker processes
+        executor_cls: Process pool class to create
+        initializer: Optional extra per-worker setup, run after logging
+        initargs: Arguments for the initializer
+        
+    Returns:
+        The new process pool
+    """
+    return executor_cls(
+        max_workers=max_workers,
+        initializer=_init_worker,
+        initargs=(worker_log_queue(), logging.getLogger().level, initializer, initargs)
+    )
+
+
+def _init_worker(
+    log_queue: Any,
+    level: int,
+    initializer: Optional[Callable[..., None]],
+    initargs: Tuple[Any, ...]
+) -> None:
+    """Set up logging in a pool worker, then run the pool's own initializer"""
+    init_worker_logging(log_queue, level)
+    if initializer is not None:
+        initializer(*initargs)
+
+
+def map_documents(
+    func: Callable[[T], R],
+    items: Iterable[T],
+    max_workers: Optional[int] = None,
+    executor_cls: Type[Executor] = ThreadPoolExecutor,
+    chunksize: int = 1,
+    executor: Optional[Executor] = None
+) -> List[R]:
+    """
+    Apply a function to every item concurrently, preserving input order
+    
+    Args:
+        func: Function to apply to each item
+        items: Items to process
+        max_workers: Maximum number of workers (default: CPU count)
+        executor_cls: Executor class used to run the work
+        chunksize: Items sent to a worker process at a time (process pools only)
+        executor: Long-lived executor to run the work on instead of creating
+            one; it is left running afterwards
+        
+    Returns:
+        List of results in the same order as the input items
+    """
+    items = list(items)
+    workers = min(max_workers or os.cpu_count() or 1, len(items))
+    
+    # Not worth starting a pool for a single document
+    if workers <= 1:
+        return [func(item) for item in items]
+    
+    if executor is not None:
+        return list(executor.map(func, items, chunksize=chunksize))
+    
+    if issubclass(executor_cls, ProcessPoolExecutor):
+        pool = process_pool(workers, executor_cls)
+    else:
+        pool = executor_cls(max_workers=workers)
+    
+    with pool as executor:
+        return list(executor.map(func, items, chunksize=chunksize))
@@ -5,36 +5,43 @@ This service integrates Google's Gemini 2.0 model to provide AI-powered
 analysis and summarization of Certificate of Insurance documents.
 """
 
+import asyncio
 import os
-from typing import Dict, Any, List, Optional
+import textwrap
+from typing import Dict, Any, Iterator, List, Optional
 import google.generativeai as genai
+from google.api_core import retry as api_retry
 from dotenv import load_dotenv
-import json
+import orjson
 import logging
 
 # Load environment variables
 load_dotenv()
 
-# Configure logging
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+MODEL_NAME = 'gemini-2.0-flash-exp'
+
+# All calls go over the SDK's single long-lived gRPC (HTTP/2) channel; these
+# options bound each call and retry transient failures with backoff. Retries
+# give up within GEMINI_TIMEOUT, the same limit the API waits for a call, so
+# no request keeps retrying after its caller has returned 504.
+GEMINI_TIMEOUT = float(os.getenv("GEMINI_TIMEOUT", 55))
+REQUEST_OPTIONS = {
+    "timeout": GEMINI_TIMEOUT,
+    "retry": api_retry.Retry(initial=1.0, maximum=10.0, multiplier=2.0, timeout=GEMINI_TIMEOUT),
+}
+ASYNC_REQUEST_OPTIONS = {
+    "timeout": GEMINI_TIMEOUT,
+    "retry": api_retry.AsyncRetry(initial=1.0, maximum=10.0, multiplier=2.0, timeout=GEMINI_TIMEOUT),
+}
+
 class GeminiService:
     """Service class for interacting with Google Gemini AI"""
     
-    def __init__(self):
-        """Initialize Gemini service with API key"""
-        api_key = os.getenv('GEMINI_API_KEY')
-        if not api_key:
-            raise ValueError("GEMINI_API_KEY not found in environment variables")
-        
-        genai.configure(api_key=api_key)
-        self.model = genai.GenerativeModel('gemini-2.0-flash-exp')
-        logger.info("Gemini service initialized successfully")
-    
-    def get_system_prompt(self) -> str:
-        """Get the system prompt for COI analysis"""
-        return """
+    # Prompts are built once per process; the per-request builders only fill
+    # in the document-specific parts
+    SYSTEM_PROMPT = textwrap.dedent("""
         You are an expert insurance document analyzer specializing in Certificate of Insurance (COI) documents.
         Your role is to analyze COI documents and provide comprehensive insights about insurance coverage, compliance, and risk assessment.
         
@@ -50,7 +57,83 @@ class GeminiService:
         - Highlight critical compliance issues
         - Provide clear explanations for non-experts
         - Focus on risk assessment and recommendations
-        """
+        """)
+    
+    ANALYSIS_TEMPLATE = textwrap.dedent("""
+        Please analyze the following Certificate of Insurance document:
+        
+        DOCUMENT TEXT:
+        {document_text}
+        
+        PARSED FIELDS:
+        {parsed_fields}
+        
+        Please provide a comprehensive analysis including:
+        1. **Document Overview**: Summary of the insurance certificate
+        2. **Coverage Analysis**: Detailed review of coverage types and limits
+        3. **Policy Details**: Key policy information and terms
+        4. **Risk Assessment**: Potential risks and coverage gaps
+        5. **Compliance Notes**: Any compliance considerations
+        6. **Recommendations**: Actionable recommendations for improvement
+        
+        Format your response in clear sections with markdown formatting.
+        """)
+    
+    SUMMARY_TEMPLATE = textwrap.dedent("""
+        Please generate a comprehensive summary of this Certificate of Insurance document:
+        
+        DOCUMENT TEXT:
+        {document_text}
+        
+        COMPLIANCE VALIDATION RESULTS:
+        {compliance_results}
+        
+        Please provide:
+        1. **Executive Summary**: Brief overview of the document
+        2. **Key Findings**: Most important discoveries from the analysis
+        3. **Compliance Status**: Summary of compliance validation results
+        4. **Critical Issues**: Any urgent issues that need attention
+        5. **Recommendations**: Top 3-5 actionable recommendations
+        6. **Next Steps**: Suggested follow-up actions
+        
+        Keep the summary concise but comprehensive, suitable for stakeholders and decision-makers.
+        Format your response in clear sections with markdown formatting.
+        """)
+    
+    INSIGHTS_TEMPLATE = textwrap.dedent("""
+        Extract the top 5 key insights from this Certificate of Insurance document:
+        
+        {document_text}
+        
+        Return insights as a JSON array of strings, focusing on:
+        - Critical coverage information
+        - Important policy terms
+        - Potential risks or gaps
+        - Compliance considerations
+        - Notable features or limitations
+        
+        Format: ["insight 1", "insight 2", "insight 3", "insight 4", "insight 5"]
+        """)
+    
+    def __init__(self):
+        """Initialize Gemini service with API key"""
+        api_key = os.getenv('GEMINI_API_KEY')
+        if not api_key:
+            raise ValueError("GEMINI_API_KEY not found in environment variables")
+        
+        # gRPC is the SDK default; naming it explicitly would also put the
+        # async client on the blocking transport
+        genai.configure(api_key=api_key)
+        self.model = self._create_model()
+        logger.info("Gemini service initialized successfully")
+    
+    def _create_model(self) -> genai.GenerativeModel:
+        """Create the model with the system prompt attached once as its system instruction"""
+        return genai.GenerativeModel(MODEL_NAME, system_instruction=self.get_system_prompt())
+    
+    def get_system_prompt(self) -> str:
+        """Get the system prompt for COI analysis"""
+        return self.SYSTEM_PROMPT
     
     def analyze_coi_document(self, document_text: str, parsed_fields: Dict[str, Any]) -> Dict[str, Any]:
         """
@@ -65,10 +148,29 @@ class GeminiService:
         """
         try:
             prompt = self._build_analysis_prompt(document_text, parsed_fields)
-            response = self.model.generate_content(prompt)
+            text = self._generate(prompt)
             
             return {
-                "analysis": response.text,
+                "analysis": text,
+                "status": "success",
+                "model": "gemini-2.0-flash"
+            }
+        except Exception as e:
+            logger.error(f"Error analyzing COI document: {e}")
+            return {
+                "analysis": f"Error analyzing document: {str(e)}",
+                "status": "error",
+                "model": "gemini-2.0-flash"
+            }
+    
+    async def analyze_coi_document_async(self, document_text: str, parsed_fields: Dict[str, Any]) -> Dict[str, Any]:
+        """Asynchronous version of analyze_coi_document"""
+        try:
+            prompt = self._build_analysis_prompt(document_text, parsed_fields)
+            text = await self._generate_async(prompt)
+            
+            return {
+                "analysis": text,
                 "status": "success",
                 "model": "gemini-2.0-flash"
             }
@@ -93,10 +195,10 @@ class GeminiService:
         """
         try:
             prompt = self._build_summary_prompt(document_text, compliance_results)
-            response = self.model.generate_content(prompt)
+            text = self._generate(prompt)
             
             return {
-                "summary": response.text,
+                "summary": text,
                 "status": "success",
                 "model": "gemini-2.0-flash"
             }
@@ -108,54 +210,63 @@ class GeminiService:
                 "model": "gemini-2.0-flash"
             }
     
-    def _build_analysis_prompt(self, document_text: str, parsed_fields: Dict[str, Any]) -> str:
-        """Build the analysis prompt for Gemini"""
-        return f"""
-        {self.get_system_prompt()}
-        
-        Please analyze the following Certificate of Insurance document:
-        
-        DOCUMENT TEXT:
-        {document_text}
-        
-        PARSED FIELDS:
-        {json.dumps(parsed_fields, indent=2)}
-        
-        Please provide a comprehensive analysis including:
-        1. **Document Overview**: Summary of the insurance certificate
-        2. **Coverage Analysis**: Detailed review of coverage types and limits
-        3. **Policy Details**: Key policy information and terms
-        4. **Risk Assessment**: Potential risks and coverage gaps
-        5. **Compliance Notes**: Any compliance considerations
-        6. **Recommendations**: Actionable recommendations for improvement
+    async def generate_summary_async(self, document_text: str, compliance_results: Dict[str, Any]) -> Dict[str, Any]:
+        """Asynchronous version of generate_summary"""
+        try:
+            prompt = self._build_summary_prompt(document_text, compliance_results)
+            text = await self._generate_async(prompt)
+            
+            return {
+                "summary": text,
+                "status": "success",
+                "model": "gemini-2.0-flash"
+            }
+        except Exception as e:
+            logger.error(f"Error generating summary: {e}")
+            return {
+                "summary": f"Error generating summary: {str(e)}",
+                "status": "error",
+                "model": "gemini-2.0-flash"
+            }
+    
+    def stream_summary(self, document_text: str, compliance_results: Dict[str, Any]) -> Iterator[str]:
+        """
+        Stream the COI document summary as it is generated
         
-        Format your response in clear sections with markdown formatting.
+        Args:
+            document_text: Raw text extracted from the COI document
+            compliance_results: Results from compliance validation
+            
+        Yields:
+            Summary text chunks in the order Gemini produces them
         """
+        prompt = self._build_summary_prompt(document_text, compliance_results)
+        for chunk in self.model.generate_content(prompt, stream=True, request_options=REQUEST_OPTIONS):
+            if chunk.parts:
+                yield chunk.text
+    
+    def _generate(self, prompt: str) -> str:
+        """Return Gemini's response text for a prompt"""
+        return self.model.generate_content(prompt, request_options=REQUEST_OPTIONS).text
+    
+    async def _generate_async(self, prompt: str) -> str:
+        """Asynchronous version of _generate"""
+        response = await self.model.generate_content_async(prompt, request_options=ASYNC_REQUEST_OPTIONS)
+        return response.text
+    
+    def _build_analysis_prompt(self, document_text: str, parsed_fields: Dict[str, Any]) -> str:
+        """Build the analysis prompt for Gemini"""
+        return self.ANALYSIS_TEMPLATE.format_map({
+            "document_text": document_text,
+            "parsed_fields": orjson.dumps(parsed_fields, option=orjson.OPT_INDENT_2).decode()
+        })
     
     def _build_summary_prompt(self, document_text: str, compliance_results: Dict[str, Any]) -> str:
         """Build the summary prompt for Gemini"""
-        return f"""
-        {self.get_system_prompt()}
-        
-        Please generate a comprehensive summary of this Certificate of Insurance document:
-        
-        DOCUMENT TEXT:
-        {document_text}
-        
-        COMPLIANCE VALIDATION RESULTS:
-        {json.dumps(compliance_results, indent=2)}
-        
-        Please provide:
-        1. **Executive Summary**: Brief overview of the document
-        2. **Key Findings**: Most important discoveries from the analysis
-        3. **Compliance Status**: Summary of compliance validation results
-        4. **Critical Issues**: Any urgent issues that need attention
-        5. **Recommendations**: Top 3-5 actionable recommendations
-        6. **Next Steps**: Suggested follow-up actions
-        
-        Keep the summary concise but comprehensive, suitable for stakeholders and decision-makers.
-        Format your response in clear sections with markdown formatting.
-        """
+        return self.SUMMARY_TEMPLATE.format_map({
+            "document_text": document_text,
+            "compliance_results": orjson.dumps(compliance_results, option=orjson.OPT_INDENT_2).decode()
+        })
     
     def extract_key_insights(self, document_text: str) -> List[str]:
         """
@@ -168,35 +279,66 @@ class GeminiService:
             List of key insights
         """
         try:
-            prompt = f"""
-            {self.get_system_prompt()}
-            
-            Extract the top 5 key insights from this Certificate of Insurance document:
-            
-            {document_text}
-            
-            Return insights as a JSON array of strings, focusing on:
-            - Critical coverage information
-            - Important policy terms
-            - Potential risks or gaps
-            - Compliance considerations
-            - Notable features or limitations
+            prompt = self.INSIGHTS_TEMPLATE.format_map({"document_text": document_text})
             
-            Format: ["insight 1", "insight 2", "insight 3", "insight 4", "insight 5"]
-            """
-            
-            response = self.model.generate_content(prompt)
+            return self._parse_insights(self._generate(prompt))
+                
+        except Exception as e:
+            logger.error(f"Error extracting insights: {e}")
+            return [f"Error extracting insights: {str(e)}"]
+    
+    async def extract_key_insights_async(self, document_text: str) -> List[str]:
+        """Asynchronous version of extract_key_insights"""
+        try:
+            prompt = self.INSIGHTS_TEMPLATE.format_map({"document_text": document_text})
             
-            # Try to parse as JSON, fallback to text split
-            try:
-                insights = json.loads(response.text)
-                return insights if isinstance(insights, list) else [response.text]
-            except:
-                # Fallback: split by lines and clean
-                lines = response.text.split('\n')
-                insights = [line.strip('- ').strip() for line in lines if line.strip()]
-                return insights[:5]
+            return self._parse_insights(await self._generate_async(prompt))
                 
         except Exception as e:
             logger.error(f"Error extracting insights: {e}")
             return [f"Error extracting insights: {str(e)}"]
+    
+    def _parse_insights(self, text: str) -> List[str]:
+        """Parse the insights response as JSON, falling back to a text split"""
+        try:
+            insights = orjson.loads(text)
+            return insights if isinstance(insights, list) else [text]
+        except:
+            # Fallback: split by lines and clean
+            lines = text.split('\n')
+            insights = [line.strip('- ').strip() for line in lines if line.strip()]
+            return insights[:5]
+    
+    async def process_document(
+        self,
+        document_text: str,
+        parsed_fields: Dict[str, Any],
+        compliance_results: Dict[str, Any],
+        enable_analysis: bool = True,
+        enable_summary: bool = True
+    ) -> Dict[str, Any]:
+        """
+        Run the enabled Gemini analyses for one document concurrently
+        
+        Args:
+            document_text: Raw text extracted from the COI document
+            parsed_fields: Structured data parsed from the document
+            compliance_results: Results from compliance validation
+            enable_analysis: Whether to perform detailed analysis
+            enable_summary: Whether to generate summary
+            
+        Returns:
+            Dictionary with detailed_analysis, summary and key_insights entries
+            for the analyses that were run
+        """
+        calls = {}
+        if enable_analysis:
+            calls['detailed_analysis'] = self.analyze_coi_document_async(document_text, parsed_fields)
+        if enable_summary:
+            calls['summary'] = self.generate_summary_async(document_text, compliance_results)
+        calls['key_insights'] = self.extract_key_insights_async(document_text)
+        
+        # The requests are independent, so the document takes as long as
+        # the slowest one rather than all of them in turn
+        results = await asyncio.gather(*calls.values())
+        return dict(zip(calls, results))